@@ -0,0 +1,584 @@
+"""Offline-Benchmark mit lokalen Paperless- und Google-Tasks-Attrappen.
+
+Startet im selben Prozess einen Paperless-REST-Server, einen Google-Tasks-Server
+(inkl. HTTP-Batch) und die App selbst, jeweils auf einem freien Port, und misst:
+
+- poll:    Poller-Lauf (voll und inkrementell) über alle Listen
+- webhook: Burst von Paperless-Webhooks samt Abarbeitung der Warteschlange
+- pdf:     Laden von /view_pdf und /proxy_download (kalt und aus dem Cache)
+
+Ausgegeben werden Requests/s, p50/p99-Latenz, Aufrufe je Upstream-Endpunkt und
+der Spitzenverbrauch an Speicher (RSS, mit --trace-memory zusätzlich je Phase).
+Es werden weder das echte Paperless noch das Google-Konto angesprochen;
+Konfiguration, Token und state.db liegen in einem temporären Verzeichnis.
+
+    python3 benchmarks/bench.py                       # kleiner Datensatz
+    python3 benchmarks/bench.py --preset large        # 50 Listen × 5.000 Tasks, 100.000 Dokumente
+    python3 benchmarks/bench.py --google-latency-ms 40 --paperless-latency-ms 15 --json
+"""
+
+import argparse
+import collections
+import datetime
+import email.parser
+import json
+import logging
+import os
+import re
+import resource
+import sys
+import tempfile
+import threading
+import time
+import tracemalloc
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import parse_qs, urlsplit
+
+import requests
+from flask import Flask, Response, request
+from werkzeug.serving import make_server
+
+REPO_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+PRESETS = {
+    "small": {"lists": 5, "tasks_per_list": 500, "documents": 5000},
+    "large": {"lists": 50, "tasks_per_list": 5000, "documents": 100000},
+}
+
+CF_BEARBEITET, CF_STATUS, CF_AKTION = 3, 4, 5
+STATUS_LABEL_TO_ID = {
+    "Unbearbeitet": "s-new",
+    "Weitergeleitet": "s-fwd",
+    "Erledigt": "s-done",
+    "keine Aktion": "s-none",
+}
+
+
+class CallCounter:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.calls = collections.Counter()
+
+    def inc(self, key):
+        with self._lock:
+            self.calls[key] += 1
+
+    def snapshot(self):
+        with self._lock:
+            return collections.Counter(self.calls)
+
+
+def rfc3339(ts):
+    return datetime.datetime.fromtimestamp(ts, datetime.timezone.utc).strftime("%Y-%m-%dT%H:%M:%S.%fZ")
+
+
+# ==== PAPERLESS-ATTRAPPE ====
+class FakePaperless:
+    """Paperless-REST-API mit berechneten Dokumenten; nur geänderte werden gespeichert."""
+
+    def __init__(self, documents, pdf_bytes, latency):
+        self.documents = documents
+        self.latency = latency
+        self.pdf = (b"%PDF-1.4\n" + b"0" * pdf_bytes)[:max(pdf_bytes, 16)]
+        self.counter = CallCounter()
+        self._lock = threading.Lock()
+        self._docs = {}
+        self.lookups = {
+            "correspondents": [{"id": i, "name": f"Korrespondent {i}"} for i in range(1, 51)],
+            "document_types": [{"id": i, "name": f"Typ {i}"} for i in range(1, 21)],
+            "tags": [{"id": i, "name": f"Tag {i}"} for i in range(1, 31)],
+            "custom_fields": [
+                {"id": CF_BEARBEITET, "name": "Bearbeitet am", "data_type": "date"},
+                {"id": CF_STATUS, "name": "Bearbeitungsstatus", "data_type": "select",
+                 "extra_data": {"select_options": [
+                     {"id": v, "label": k} for k, v in STATUS_LABEL_TO_ID.items()
+                 ]}},
+                {"id": CF_AKTION, "name": "Aktion", "data_type": "integer"},
+            ],
+        }
+
+    def document(self, doc_id):
+        with self._lock:
+            doc = self._docs.get(doc_id)
+            if doc is not None:
+                return json.loads(json.dumps(doc))
+        return {
+            "id": doc_id,
+            "title": f"Dokument {doc_id}",
+            "correspondent": doc_id % 50 + 1,
+            "document_type": doc_id % 20 + 1,
+            "added": "2024-01-01T10:00:00+01:00",
+            "modified": "2024-01-01T10:00:00+01:00",
+            "custom_fields": [
+                {"field": CF_AKTION, "value": 80 if doc_id % 2 else 10},
+                {"field": CF_STATUS, "value": STATUS_LABEL_TO_ID["Unbearbeitet"]},
+            ],
+        }
+
+    def etag(self, doc):
+        return f'"{doc["id"]}-{doc["modified"]}"'
+
+    def paged(self, items, params):
+        page = int(params.get("page", 1))
+        size = int(params.get("page_size", 25))
+        chunk = items[(page - 1) * size:page * size]
+        if not chunk and page > 1:
+            return Response(status=404)
+        more = page * size < len(items)
+        return {"count": len(items), "next": f"?page={page + 1}" if more else None, "results": chunk}
+
+    def handle(self, method, path):
+        if self.latency:
+            time.sleep(self.latency)
+        m = re.fullmatch(r"/api/documents/(\d+)/(download/)?", path)
+        if m:
+            doc_id = int(m.group(1))
+            if not 1 <= doc_id <= self.documents:
+                self.counter.inc(f"{method} /api/documents/<id>/")
+                return Response(status=404)
+            if m.group(2):
+                self.counter.inc("GET /api/documents/<id>/download/")
+                return self.download()
+            self.counter.inc(f"{method} /api/documents/<id>/")
+            if method == "PATCH":
+                return self.patch(doc_id)
+            doc = self.document(doc_id)
+            tag = self.etag(doc)
+            if request.headers.get("If-None-Match") == tag:
+                return Response(status=304, headers={"ETag": tag})
+            return Response(json.dumps(doc), mimetype="application/json", headers={"ETag": tag})
+        if path == "/api/documents/":
+            self.counter.inc("GET /api/documents/")
+            page = int(request.args.get("page", 1))
+            size = int(request.args.get("page_size", 25))
+            first = (page - 1) * size + 1
+            if first > self.documents:
+                return Response(status=404)
+            last = min(self.documents, first + size - 1)
+            return {
+                "count": self.documents,
+                "next": f"?page={page + 1}" if last < self.documents else None,
+                "results": [self.document(i) for i in range(first, last + 1) if i % 2],
+            }
+        m = re.fullmatch(r"/api/(\w+)/(?:(\d+)/)?", path)
+        if m and m.group(1) in self.lookups:
+            items = self.lookups[m.group(1)]
+            if m.group(2):
+                self.counter.inc(f"GET /api/{m.group(1)}/<id>/")
+                item = next((i for i in items if i["id"] == int(m.group(2))), None)
+                return item if item else Response(status=404)
+            self.counter.inc(f"GET /api/{m.group(1)}/")
+            return self.paged(items, request.args)
+        self.counter.inc(f"{method} <unbekannt>")
+        return Response(status=404)
+
+    def patch(self, doc_id):
+        body = request.get_json(force=True)
+        doc = self.document(doc_id)
+        doc.update(body)
+        doc["modified"] = datetime.datetime.now(datetime.timezone.utc).isoformat()
+        with self._lock:
+            self._docs[doc_id] = doc
+        return Response(json.dumps(doc), mimetype="application/json", headers={"ETag": self.etag(doc)})
+
+    def download(self):
+        pdf = self.pdf
+        def stream():
+            for i in range(0, len(pdf), 64 * 1024):
+                yield pdf[i:i + 64 * 1024]
+        return Response(stream(), mimetype="application/pdf", headers={"Content-Length": str(len(pdf))})
+
+    def wsgi(self):
+        app = Flask("fake_paperless")
+
+        @app.route("/<path:path>", methods=["GET", "PATCH", "POST"])
+        def catch_all(path):
+            return self.handle(request.method, "/" + path)
+
+        return app
+
+
+# ==== GOOGLE-TASKS-ATTRAPPE ====
+class FakeGoogleTasks:
+    """Tasks-API v1 (Listen, Tasks, HTTP-Batch) im Speicher."""
+
+    def __init__(self, lists, tasks_per_list, documents, completed_ratio, latency):
+        self.latency = latency
+        self.counter = CallCounter()
+        self._lock = threading.Lock()
+        self._seq = 0
+        self.lists = {}
+        self.tasks = {}
+        now = time.time() - 86400
+        every = max(1, int(round(1 / completed_ratio))) if completed_ratio else 0
+        for li in range(lists):
+            list_id = f"list{li}"
+            self.lists[list_id] = {"id": list_id, "title": f"Liste {li}"}
+            tasks = self.tasks[list_id] = {}
+            for ti in range(tasks_per_list):
+                # Tasks gehören zu Dokumenten mit ungerader ID (Aktion über dem Schwellwert)
+                doc_id = (2 * (li * tasks_per_list + ti)) % documents + 1
+                notes = (
+                    "Status: Unbearbeitet\n"
+                    f"Typ: Typ {doc_id % 20 + 1}\n"
+                    f"Dokument-ID: {doc_id}"
+                )
+                # Verschiedene Änderungszeitpunkte, damit updatedMin wie bei Google filtert
+                task = self._new_task(f"Dokument {doc_id}", notes, now + self._seq * 0.001)
+                if every and ti % every == 0:
+                    task["status"] = "completed"
+                    task["completed"] = task["updated"]
+                tasks[task["id"]] = task
+
+    def _new_task(self, title, notes, ts=None):
+        self._seq += 1
+        ts = time.time() if ts is None else ts
+        return {
+            "kind": "tasks#task",
+            "id": f"t{self._seq}",
+            "etag": f'"e{self._seq}"',
+            "title": title,
+            "notes": notes,
+            "status": "needsAction",
+            "updated": rfc3339(ts),
+        }
+
+    @staticmethod
+    def _project(task, fields):
+        # Nur die Feldprojektion items(...) bzw. a,b,c wird beachtet
+        if not fields:
+            return dict(task)
+        m = re.search(r"items\(([^)]*)\)", fields)
+        names = (m.group(1) if m else fields).split(",")
+        return {k: v for k, v in task.items() if k in names}
+
+    def dispatch(self, method, path, params, body):
+        """Gemeinsamer Einstieg für Einzel- und Batch-Aufrufe; liefert (status, json)."""
+        path = path.split("?", 1)[0]
+        fields = params.get("fields")
+        if path == "/tasks/v1/users/@me/lists":
+            self.counter.inc("tasklists.list")
+            items = sorted(self.lists.values(), key=lambda l: l["id"])
+            return 200, self._page(items, params, None)
+        m = re.fullmatch(r"/tasks/v1/lists/([^/]+)/tasks(?:/([^/]+))?", path)
+        if not m or m.group(1) not in self.tasks:
+            self.counter.inc(f"{method} <unbekannt>")
+            return 404, {"error": {"code": 404, "message": "Not Found"}}
+        tasks = self.tasks[m.group(1)]
+        task_id = m.group(2)
+        if task_id is None and method == "GET":
+            self.counter.inc("tasks.list")
+            with self._lock:
+                items = list(tasks.values())
+            updated_min = params.get("updatedMin")
+            if updated_min:
+                items = [t for t in items if t["updated"] >= updated_min]
+            if params.get("showDeleted") not in ("true", "True"):
+                items = [t for t in items if not t.get("deleted")]
+            return 200, self._page(items, params, fields)
+        if task_id is None and method == "POST":
+            self.counter.inc("tasks.insert")
+            with self._lock:
+                task = self._new_task(body.get("title", ""), body.get("notes", ""))
+                tasks[task["id"]] = task
+            return 200, self._project(task, fields)
+        with self._lock:
+            task = tasks.get(task_id)
+            if task is None:
+                self.counter.inc(f"tasks.{method.lower()}")
+                return 404, {"error": {"code": 404, "message": "Not Found"}}
+            if method == "PATCH":
+                self.counter.inc("tasks.patch")
+                self._seq += 1
+                task.update(body)
+                task["etag"] = f'"e{self._seq}"'
+                task["updated"] = rfc3339(time.time())
+            else:
+                self.counter.inc("tasks.get")
+            return 200, self._project(task, fields)
+
+    def _page(self, items, params, fields):
+        size = int(params.get("maxResults", 100))
+        start = int(params.get("pageToken") or 0)
+        chunk = items[start:start + size]
+        page = {"items": [self._project(t, fields) for t in chunk] if fields else chunk}
+        if start + size < len(items):
+            page["nextPageToken"] = str(start + size)
+        return page
+
+    def batch(self):
+        """multipart/mixed nach dem Format, das googleapiclient.http.BatchHttpRequest erzeugt."""
+        self.counter.inc("batch")
+        raw = b"Content-Type: " + request.headers["Content-Type"].encode() + b"\r\n\r\n" + request.get_data()
+        message = email.parser.BytesParser().parsebytes(raw)
+        boundary = "batch_bench_boundary"
+        out = []
+        for part in message.get_payload():
+            payload = part.get_payload()
+            head, _, body = payload.partition("\r\n\r\n") if "\r\n\r\n" in payload else payload.partition("\n\n")
+            request_line = head.splitlines()[0]
+            method, url, _ = request_line.split(" ", 2)
+            parsed = urlsplit(url)
+            params = {k: v[0] for k, v in parse_qs(parsed.query).items()}
+            status, obj = self.dispatch(method, parsed.path, params, json.loads(body) if body.strip() else {})
+            out.append(
+                f"--{boundary}\r\nContent-Type: application/http\r\n"
+                f"Content-ID: <response-{part['Content-ID'][1:-1]}>\r\n\r\n"
+                f"HTTP/1.1 {status} {'OK' if status == 200 else 'Error'}\r\n"
+                f"Content-Type: application/json; charset=UTF-8\r\n\r\n{json.dumps(obj)}\r\n"
+            )
+        out.append(f"--{boundary}--\r\n")
+        return Response("".join(out), mimetype=f"multipart/mixed; boundary={boundary}")
+
+    def wsgi(self):
+        app = Flask("fake_google_tasks")
+
+        @app.route("/<path:path>", methods=["GET", "POST", "PATCH", "PUT", "DELETE"])
+        def catch_all(path):
+            if self.latency:
+                time.sleep(self.latency)
+            if path in ("batch", "batch/tasks/v1"):
+                return self.batch()
+            params = {k: v for k, v in request.args.items()}
+            body = request.get_json(force=True, silent=True) or {}
+            status, obj = self.dispatch(request.method, "/" + path, params, body)
+            return Response(json.dumps(obj), status=status, mimetype="application/json")
+
+        return app
+
+
+# ==== HILFSFUNKTIONEN ====
+class ServerThread:
+    def __init__(self, app):
+        self.server = make_server("127.0.0.1", 0, app, threaded=True)
+        self.url = f"http://127.0.0.1:{self.server.server_port}"
+        self.thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+        self.thread.start()
+
+    def stop(self):
+        self.server.shutdown()
+
+
+def percentile(values, q):
+    if not values:
+        return None
+    values = sorted(values)
+    return values[min(len(values) - 1, int(round(q * (len(values) - 1))))]
+
+
+def latency_summary(latencies, wall):
+    return {
+        "requests": len(latencies),
+        "requests_per_second": round(len(latencies) / wall, 1) if wall else None,
+        "p50_ms": round(percentile(latencies, 0.5) * 1000, 2) if latencies else None,
+        "p99_ms": round(percentile(latencies, 0.99) * 1000, 2) if latencies else None,
+    }
+
+
+def drive(url, count, concurrency, method="GET", payload=None):
+    """Schickt count Requests mit concurrency parallelen Clients; liefert Latenzen und Statuscodes."""
+    local = threading.local()
+    def one(i):
+        session = getattr(local, "session", None)
+        if session is None:
+            session = local.session = requests.Session()
+        target = url(i) if callable(url) else url
+        body = payload(i) if callable(payload) else payload
+        started = time.perf_counter()
+        resp = session.request(method, target, json=body)
+        resp.content
+        return time.perf_counter() - started, resp.status_code
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        results = list(pool.map(one, range(count)))
+    wall = time.perf_counter() - started
+    summary = latency_summary([r[0] for r in results], wall)
+    summary["status"] = dict(collections.Counter(r[1] for r in results))
+    return summary
+
+
+def max_rss_mib():
+    # ru_maxrss ist unter Linux in KiB, unter macOS in Byte angegeben
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return round(rss / (2 ** 20 if sys.platform == "darwin" else 1024), 1)
+
+
+def delta(after, before):
+    return {k: v - before.get(k, 0) for k, v in sorted(after.items()) if v - before.get(k, 0)}
+
+
+class Bench:
+    def __init__(self, args, workdir):
+        self.args = args
+        self.workdir = workdir
+        self.paperless = FakePaperless(args.documents, args.pdf_kib * 1024, args.paperless_latency_ms / 1000)
+        self.google = FakeGoogleTasks(
+            args.lists, args.tasks_per_list, args.documents, args.completed_ratio, args.google_latency_ms / 1000
+        )
+        self.paperless_server = ServerThread(self.paperless.wsgi())
+        self.google_server = ServerThread(self.google.wsgi())
+        self.pti = self.load_app()
+        self.app_server = ServerThread(self.pti.create_app())
+
+    def load_app(self):
+        token_path = os.path.join(self.workdir, "token.json")
+        with open(token_path, "w", encoding="utf-8") as f:
+            json.dump({
+                "token": "bench", "refresh_token": "bench", "client_id": "bench", "client_secret": "bench",
+                "token_uri": "http://127.0.0.1:9/token", "scopes": ["https://www.googleapis.com/auth/tasks"],
+                "expiry": (datetime.datetime.now(datetime.timezone.utc) + datetime.timedelta(days=1))
+                .strftime("%Y-%m-%dT%H:%M:%S.%fZ"),
+            }, f)
+        config_path = os.path.join(self.workdir, "config.json")
+        with open(config_path, "w", encoding="utf-8") as f:
+            json.dump({
+                "PAPERLESS_URL": self.paperless_server.url,
+                "PAPERLESS_TOKEN": "bench",
+                "SCOPES": ["https://www.googleapis.com/auth/tasks"],
+                "GOOGLE_TASKS_TOKEN": token_path,
+                "GOOGLE_TASKS_ROOT_URL": self.google_server.url,
+                "ACTION_TASK_LIST_ID": "list0",
+                "ACTION_THRESHOLD": 49,
+                "CUSTOM_FIELD_STATUS": CF_STATUS,
+                "CUSTOM_FIELD_AKTION": CF_AKTION,
+                "CUSTOM_FIELD_BEARBEITET": CF_BEARBEITET,
+                "STATUS_LABEL_TO_ID": STATUS_LABEL_TO_ID,
+                "STATUS_LABEL_NEW": "Unbearbeitet",
+                "STATUS_LABEL_DONE": "Erledigt",
+                "SERVER_BASE_URL": "http://localhost:8080",
+                "STATE_DB_PATH": os.path.join(self.workdir, "state.db"),
+                "PDF_CACHE_DIR": os.path.join(self.workdir, "pdf_cache"),
+                "GOOGLE_QUOTA_PER_MINUTE": 600000,
+                "GOOGLE_QUOTA_PER_DAY": 10 ** 9,
+                "GOOGLE_RATE_BURST": 10000,
+                "LOG_LEVEL": "WARNING",
+                "FLASK_SECRET_KEY": "bench",
+            }, f)
+        os.environ["CONFIG_PATH"] = config_path
+        sys.path.insert(0, REPO_DIR)
+        import paperless_task_integration
+        return paperless_task_integration
+
+    def upstream(self):
+        return self.paperless.counter.snapshot(), self.google.counter.snapshot()
+
+    def measure(self, name, fn):
+        paperless_before, google_before = self.upstream()
+        if tracemalloc.is_tracing():
+            tracemalloc.reset_peak()
+        result = fn()
+        paperless_after, google_after = self.upstream()
+        result["paperless_calls"] = delta(paperless_after, paperless_before)
+        result["google_calls"] = delta(google_after, google_before)
+        if tracemalloc.is_tracing():
+            result["peak_python_mib"] = round(tracemalloc.get_traced_memory()[1] / 2 ** 20, 1)
+        result["max_rss_mib"] = max_rss_mib()
+        return name, result
+
+    def poll(self, full):
+        started = time.perf_counter()
+        self.pti.update_bearbeitet_am_for_completed_tasks(full=full)
+        wall = time.perf_counter() - started
+        summary = json.loads(self.pti.get_state_value("last_completed_tasks_run", "null")) or {}
+        return {
+            "seconds": round(wall, 3),
+            "tasks_seen": summary.get("tasks_seen"),
+            "documents_done": summary.get("documents_done"),
+            "documents_per_second": summary.get("documents_per_second"),
+        }
+
+    def webhook_burst(self):
+        args = self.args
+        # Je zur Hälfte neue Dokumente und bereits mit Task verknüpfte, jeweils mit Duplikaten
+        ids = [(i * 7919) % args.documents + 1 for i in range(args.webhooks // 2)]
+        ids += [(i % 50) * 2 + 1 for i in range(args.webhooks - len(ids))]
+        result = drive(
+            f"{self.app_server.url}/paperless_webhook", len(ids), args.concurrency,
+            method="POST", payload=lambda i: {"id": ids[i]},
+        )
+        drain_started = time.perf_counter()
+        deadline = drain_started + args.drain_timeout
+        while self.pti.webhook_queue_stats()["pending"] and time.perf_counter() < deadline:
+            time.sleep(0.05)
+        result["queue_drain_seconds"] = round(time.perf_counter() - drain_started, 3)
+        result["queue_left"] = self.pti.webhook_queue_stats()["pending"]
+        return result
+
+    def pdf_loads(self, path):
+        args = self.args
+        ids = [(i % args.pdf_documents) * 2 + 1 for i in range(args.pdf_requests)]
+        return drive(lambda i: f"{self.app_server.url}/{path}/{ids[i]}", len(ids), args.concurrency)
+
+    def run(self):
+        phases = self.args.phases
+        results = []
+        if "poll" in phases:
+            results.append(self.measure("poll_full", lambda: self.poll(full=True)))
+            results.append(self.measure("poll_incremental", lambda: self.poll(full=False)))
+        if "webhook" in phases:
+            self.pti.reconcile_task_index()
+            self.pti.start_webhook_workers(self.args.webhook_workers)
+            results.append(self.measure("webhook_burst", self.webhook_burst))
+        if "pdf" in phases:
+            results.append(self.measure("view_pdf", lambda: self.pdf_loads("view_pdf")))
+            results.append(self.measure("proxy_download_cold", lambda: self.pdf_loads("proxy_download")))
+            results.append(self.measure("proxy_download_cached", lambda: self.pdf_loads("proxy_download")))
+        return results
+
+
+def print_report(args, results):
+    print(f"Datensatz: {args.lists} Listen × {args.tasks_per_list} Tasks, {args.documents} Dokumente; "
+          f"Latenz Paperless {args.paperless_latency_ms} ms, Google {args.google_latency_ms} ms")
+    for name, result in results:
+        print(f"\n== {name}")
+        for key, value in result.items():
+            if isinstance(value, dict):
+                value = ", ".join(f"{k}={v}" for k, v in value.items()) or "-"
+            print(f"  {key:24} {value}")
+    print(f"\nmax. RSS: {max_rss_mib()} MiB")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--preset", choices=sorted(PRESETS), default="small")
+    parser.add_argument("--lists", type=int)
+    parser.add_argument("--tasks-per-list", type=int)
+    parser.add_argument("--documents", type=int)
+    parser.add_argument("--completed-ratio", type=float, default=0.02, help="Anteil erledigter Tasks")
+    parser.add_argument("--paperless-latency-ms", type=float, default=0)
+    parser.add_argument("--google-latency-ms", type=float, default=0)
+    parser.add_argument("--webhooks", type=int, default=500, help="Anzahl Webhooks im Burst")
+    parser.add_argument("--webhook-workers", type=int, default=4)
+    parser.add_argument("--drain-timeout", type=float, default=300)
+    parser.add_argument("--pdf-requests", type=int, default=200)
+    parser.add_argument("--pdf-documents", type=int, default=20, help="verschiedene PDFs in der PDF-Phase")
+    parser.add_argument("--pdf-kib", type=int, default=512)
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--phases", default="poll,webhook,pdf")
+    parser.add_argument("--trace-memory", action="store_true",
+                        help="Python-Speicherspitze je Phase messen (tracemalloc, verlangsamt den Lauf)")
+    parser.add_argument("--json", action="store_true", help="Ergebnis als JSON ausgeben")
+    args = parser.parse_args()
+    for key, value in PRESETS[args.preset].items():
+        if getattr(args, key) is None:
+            setattr(args, key, value)
+    args.phases = set(args.phases.split(","))
+
+    logging.getLogger("werkzeug").setLevel(logging.ERROR)
+    if args.trace_memory:
+        tracemalloc.start()
+    with tempfile.TemporaryDirectory(prefix="pti-bench-") as workdir:
+        bench = Bench(args, workdir)
+        results = bench.run()
+    if args.json:
+        print(json.dumps({
+            "args": {k: sorted(v) if isinstance(v, set) else v for k, v in vars(args).items()},
+            "results": dict(results),
+            "max_rss_mib": max_rss_mib(),
+        }, indent=2, ensure_ascii=False))
+    else:
+        print_report(args, results)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,37 +1,401 @@
 import os
 import re
 import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 import datetime
 import sys
 import threading
 import time
 import json
-from flask import Flask, request, render_template_string, redirect, url_for, Response, jsonify
+import random
+import logging
+import bisect
+import heapq
+from contextlib import contextmanager
+import tempfile
+import copy
+import types
+import weakref
+import hashlib
+import itertools
+import signal
+import socket
+import uuid
+from collections import OrderedDict
+from functools import lru_cache
+from concurrent.futures import ThreadPoolExecutor, wait as wait_futures
+import sqlite3
+try:
+    import fcntl
+except ImportError:  # Windows: keine prozessübergreifende Sperre des PDF-Caches
+    fcntl = None
+from dataclasses import dataclass
+from typing import Any, Mapping
+from flask import Flask, request, render_template_string, redirect, url_for, Response, jsonify, send_file, abort
+from werkzeug.serving import make_server
 from google.oauth2.credentials import Credentials
-from googleapiclient.discovery import build
+from googleapiclient.discovery import build_from_document
+from googleapiclient.discovery_cache import get_static_doc
+import httplib2
+from google_auth_httplib2 import AuthorizedHttp
 from google_auth_oauthlib.flow import InstalledAppFlow
 from google.auth.transport.requests import Request
+from googleapiclient.errors import HttpError
 
 CONFIG_PATH = os.environ.get("CONFIG_PATH", "config.json")
+# Wie oft (Sekunden) höchstens per stat() geprüft wird, ob sich config.json geändert hat
+CONFIG_RELOAD_INTERVAL = float(os.environ.get("CONFIG_RELOAD_INTERVAL", "2"))
 
 
 class TokenError(Exception):
     """Wird ausgelöst, wenn kein gültiges Google-OAuth-Token vorhanden ist."""
     pass
 
+# ==== LOGGING & METRIKEN ====
+logger = logging.getLogger("paperless_tasks")
+
+class JsonLogFormatter(logging.Formatter):
+    """Eine JSON-Zeile je Log-Eintrag; Werte aus extra={...} werden als Felder übernommen."""
+
+    RESERVED = set(vars(logging.LogRecord("", 0, "", 0, "", (), None))) | {"message", "asctime"}
+
+    def format(self, record):
+        entry = {
+            "ts": datetime.datetime.fromtimestamp(record.created, datetime.timezone.utc).isoformat(timespec="milliseconds"),
+            "level": record.levelname,
+            "logger": record.name,
+            "msg": record.getMessage(),
+        }
+        tenant = getattr(_tenant_local, "tenant", None)
+        if tenant is not None:
+            entry["tenant"] = tenant.name
+        for key, value in record.__dict__.items():
+            if key not in self.RESERVED:
+                entry[key] = value
+        if record.exc_info:
+            entry["exc"] = self.formatException(record.exc_info)
+        return json.dumps(entry, ensure_ascii=False, default=str)
+
+def configure_logging(log_format="json", level="INFO"):
+    handler = logging.StreamHandler()
+    if log_format == "json":
+        handler.setFormatter(JsonLogFormatter())
+    else:
+        handler.setFormatter(logging.Formatter("%(asctime)s %(levelname)s %(message)s"))
+    logger.handlers[:] = [handler]
+    logger.setLevel(level)
+    logger.propagate = False
+
+class Metrics:
+    """Zähler und Histogramme im Prometheus-Textformat, ohne Zusatzpaket.
+
+    Jede Messung ist ein Dict-Zugriff unter einem Lock und bleibt damit auch
+    im Produktivbetrieb eingeschaltet.
+    """
+
+    BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120)
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._counters = {}
+        self._gauges = {}
+        self._histograms = {}
+
+    @staticmethod
+    def _key(name, labels):
+        return name, tuple(sorted((k, str(v)) for k, v in labels.items()))
+
+    def inc(self, name, value=1, **labels):
+        key = self._key(name, labels)
+        with self._lock:
+            self._counters[key] = self._counters.get(key, 0) + value
+
+    def set(self, name, value, **labels):
+        with self._lock:
+            self._gauges[self._key(name, labels)] = value
+
+    def observe(self, name, value, **labels):
+        key = self._key(name, labels)
+        index = bisect.bisect_left(self.BUCKETS, value)
+        with self._lock:
+            hist = self._histograms.get(key)
+            if hist is None:
+                hist = self._histograms[key] = [[0] * (len(self.BUCKETS) + 1), 0.0, 0]
+            hist[0][index] += 1
+            hist[1] += value
+            hist[2] += 1
+
+    @contextmanager
+    def timer(self, name, **labels):
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(name, time.perf_counter() - started, **labels)
+
+    def total(self, name):
+        with self._lock:
+            return sum(v for (n, _), v in self._counters.items() if n == name)
+
+    @staticmethod
+    def _labels(labels, extra=()):
+        items = list(labels) + list(extra)
+        if not items:
+            return ""
+        return "{" + ",".join(f'{k}="{v}"' for k, v in items) + "}"
+
+    def render(self):
+        lines = []
+        with self._lock:
+            for kind, store in (("counter", self._counters), ("gauge", self._gauges)):
+                for name in sorted({n for n, _ in store}):
+                    lines.append(f"# TYPE {name} {kind}")
+                    for (n, labels), value in sorted(store.items()):
+                        if n == name:
+                            lines.append(f"{name}{self._labels(labels)} {value}")
+            for name in sorted({n for n, _ in self._histograms}):
+                lines.append(f"# TYPE {name} histogram")
+                for (n, labels), (buckets, total, count) in sorted(self._histograms.items()):
+                    if n != name:
+                        continue
+                    cumulative = 0
+                    for bound, bucket_count in zip(self.BUCKETS + ("+Inf",), buckets):
+                        cumulative += bucket_count
+                        lines.append(f"{name}_bucket{self._labels(labels, [('le', bound)])} {cumulative}")
+                    lines.append(f"{name}_sum{self._labels(labels)} {total}")
+                    lines.append(f"{name}_count{self._labels(labels)} {count}")
+        return "\n".join(lines) + "\n"
+
+metrics = Metrics()
+
+# Aufrufzähler eines Laufs (z.B. Poller); /metrics zählt prozessweit über alle Läufe
+_run_local = threading.local()
+_run_counts_lock = threading.Lock()
+
+@contextmanager
+def count_calls():
+    """Zählt die Google- und Paperless-Aufrufe dieses Threads und der per bind_tenant gebundenen."""
+    counts = {"google": 0, "paperless": 0}
+    previous = getattr(_run_local, "counts", None)
+    _run_local.counts = counts
+    try:
+        yield counts
+    finally:
+        _run_local.counts = previous
+
+def count_call(kind, n=1):
+    counts = getattr(_run_local, "counts", None)
+    if counts is not None:
+        with _run_counts_lock:
+            counts[kind] += n
+
+# ==== CONFIG ====
+def _freeze(value):
+    if isinstance(value, dict):
+        return types.MappingProxyType({k: _freeze(v) for k, v in value.items()})
+    if isinstance(value, list):
+        return tuple(_freeze(v) for v in value)
+    return value
+
+@dataclass(frozen=True)
+class ConfigSnapshot:
+    """Unveränderlicher Stand der config.json samt vorberechneter Zuordnungen."""
+    raw: Mapping[str, Any]
+    mtime_ns: int
+    status_label_to_id: Mapping[str, str]
+    status_id_to_label: Mapping[str, str]
+
+    @classmethod
+    def from_dict(cls, data, mtime_ns):
+        label_to_id = dict(data.get("STATUS_LABEL_TO_ID") or {})
+        return cls(
+            raw=_freeze(data),
+            mtime_ns=mtime_ns,
+            status_label_to_id=types.MappingProxyType(label_to_id),
+            status_id_to_label=types.MappingProxyType({v: k for k, v in label_to_id.items()}),
+        )
+
+    def get(self, key, default=None):
+        return self.raw.get(key, default)
+
+class ConfigStore:
+    """Die config.json eines Mandanten; neu gelesen wird nur bei geänderter mtime."""
+
+    def __init__(self, path):
+        self.path = path
+        self._snapshot = None
+        self._checked_at = 0.0
+        self._lock = threading.Lock()
+
+    def _read(self):
+        with open(self.path, encoding="utf-8") as f:
+            mtime_ns = os.fstat(f.fileno()).st_mtime_ns
+            return ConfigSnapshot.from_dict(json.load(f), mtime_ns)
+
+    def snapshot(self):
+        snapshot = self._snapshot
+        if snapshot is not None and time.monotonic() - self._checked_at < CONFIG_RELOAD_INTERVAL:
+            return snapshot
+        with self._lock:
+            snapshot = self._snapshot
+            try:
+                mtime_ns = os.stat(self.path).st_mtime_ns
+            except FileNotFoundError:
+                if snapshot is None:
+                    raise Exception(f"Config-Datei fehlt: {self.path}")
+                mtime_ns = snapshot.mtime_ns
+            if snapshot is None or snapshot.mtime_ns != mtime_ns:
+                try:
+                    snapshot = self._read()
+                except ValueError as e:
+                    # Halb bearbeitete Datei: alten Stand behalten, falls vorhanden
+                    if snapshot is None:
+                        raise
+                    logger.warning("Config-Datei fehlerhaft, verwende bisherigen Stand: %s", e)
+                self._snapshot = snapshot
+            self._checked_at = time.monotonic()
+        return snapshot
+
+    def save(self, data):
+        with self._lock:
+            atomic_write_text(self.path, json.dumps(data, indent=2, ensure_ascii=False))
+            self._snapshot = ConfigSnapshot.from_dict(data, os.stat(self.path).st_mtime_ns)
+            self._checked_at = time.monotonic()
+
+# ==== MANDANTEN ====
+# Ein Mandant ist ein Paperless-Server mit zugehörigem Google-Konto. Der
+# Standard-Mandant kommt aus CONFIG_PATH; weitere stehen dort unter TENANTS
+# ({"name": "pfad/zur/config.json"}) und sind unter /t/<name>/... erreichbar.
+# Clients, Caches und die Zustands-DB gibt es je Mandant; welcher gerade gilt,
+# legt tenant_context() für den aktuellen Thread fest.
+DEFAULT_TENANT = "default"
+_TENANT_NAME = re.compile(r"[A-Za-z0-9_-]{1,40}")
+
+class Tenant:
+    def __init__(self, name, config_path):
+        self.name = name
+        self.config = ConfigStore(config_path)
+        self._resources = {}
+        self._lock = threading.Lock()
+
+    @property
+    def is_default(self):
+        return self.name == DEFAULT_TENANT
+
+    @property
+    def url_prefix(self):
+        return "" if self.is_default else f"/t/{self.name}"
+
+    def default_path(self, filename):
+        """Standard-Dateiname für Zustand, Cache und Token; weitere Mandanten bekommen einen eigenen."""
+        if self.is_default:
+            return filename
+        root, ext = os.path.splitext(filename)
+        return f"{root}-{self.name}{ext}"
+
+    def resource(self, name, key, factory):
+        """Gemeinsames Objekt dieses Mandanten; wird neu erzeugt, wenn sich key ändert."""
+        entry = self._resources.get(name)
+        if entry is not None and entry[0] == key:
+            return entry[1]
+        with self._lock:
+            entry = self._resources.get(name)
+            if entry is None or entry[0] != key:
+                entry = (key, factory())
+                self._resources[name] = entry
+            return entry[1]
+
+    def __repr__(self):
+        return f"Tenant({self.name!r})"
+
+_default_tenant = Tenant(DEFAULT_TENANT, CONFIG_PATH)
+_tenants = {}
+_tenants_lock = threading.Lock()
+_tenant_local = threading.local()
+
+def current_tenant():
+    return getattr(_tenant_local, "tenant", None) or _default_tenant
+
+@contextmanager
+def tenant_context(tenant):
+    previous = getattr(_tenant_local, "tenant", None)
+    _tenant_local.tenant = tenant
+    try:
+        yield tenant
+    finally:
+        _tenant_local.tenant = previous
+
+def bind_tenant(func):
+    """Bindet func an den aktuellen Mandanten (und Aufrufzähler), z.B. für Aufrufe in Pool-Threads."""
+    tenant = current_tenant()
+    counts = getattr(_run_local, "counts", None)
+    def run(*args, **kwargs):
+        previous = getattr(_run_local, "counts", None)
+        _run_local.counts = counts
+        try:
+            with tenant_context(tenant):
+                return func(*args, **kwargs)
+        finally:
+            _run_local.counts = previous
+    return run
+
+def get_tenants():
+    """Standard-Mandant und alle unter TENANTS eingetragenen, in dieser Reihenfolge."""
+    entries = _default_tenant.config.snapshot().get("TENANTS") or {}
+    base = os.path.dirname(os.path.abspath(CONFIG_PATH))
+    with _tenants_lock:
+        for name, path in entries.items():
+            if name == DEFAULT_TENANT or not _TENANT_NAME.fullmatch(name):
+                continue
+            path = os.path.join(base, path)
+            if name not in _tenants or _tenants[name].config.path != path:
+                _tenants[name] = Tenant(name, path)
+        for name in set(_tenants) - set(entries):
+            del _tenants[name]
+        return [_default_tenant] + [_tenants[name] for name in entries if name in _tenants]
+
+def get_tenant(name):
+    for tenant in get_tenants():
+        if tenant.name == name:
+            return tenant
+    return None
+
+def get_config_snapshot():
+    """Konfiguration des aktuellen Mandanten."""
+    return current_tenant().config.snapshot()
+
+def _thaw(value):
+    if isinstance(value, Mapping):
+        return {k: _thaw(v) for k, v in value.items()}
+    if isinstance(value, tuple):
+        return [_thaw(v) for v in value]
+    return value
+
 def load_config():
-    if not os.path.exists(CONFIG_PATH):
-        raise Exception(f"Config-Datei fehlt: {CONFIG_PATH}")
-    with open(CONFIG_PATH, encoding="utf-8") as f:
-        return json.load(f)
+    # Veränderbare Kopie, z.B. für die Konfigurationsoberfläche
+    return _thaw(get_config_snapshot().raw)
+
+def atomic_write_text(path, text):
+    # Atomar schreiben: Leser sehen entweder die alte oder die neue Datei
+    directory = os.path.dirname(os.path.abspath(path))
+    fd, tmp_path = tempfile.mkstemp(prefix=".tmp-", dir=directory)
+    try:
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            f.write(text)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.unlink(tmp_path)
+        raise
 
 def save_config(data):
-    with open(CONFIG_PATH, "w", encoding="utf-8") as f:
-        json.dump(data, f, indent=2, ensure_ascii=False)
+    current_tenant().config.save(data)
 
 def get_config(key, default=None):
-    config = load_config()
-    return config.get(key, default)
+    return get_config_snapshot().get(key, default)
 
 def set_config(key, value):
     config = load_config()
@@ -66,77 +430,888 @@ if not os.path.exists(CONFIG_PATH):
 
     })
 
+configure_logging(get_config("LOG_FORMAT", "json"), get_config("LOG_LEVEL", "INFO"))
+
+# ==== LOKALER ZUSTAND (SQLite) ====
+STATE_SCHEMA = """
+CREATE TABLE IF NOT EXISTS state_meta (
+    key TEXT PRIMARY KEY,
+    value TEXT
+);
+CREATE TABLE IF NOT EXISTS task_index (
+    doc_id TEXT PRIMARY KEY,
+    tasklist_id TEXT NOT NULL,
+    task_id TEXT NOT NULL,
+    etag TEXT,
+    status TEXT,
+    completed TEXT,
+    indexed_at REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS sync_watermark (
+    tasklist_id TEXT PRIMARY KEY,
+    updated_min TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS reconciled_tasks (
+    task_id TEXT PRIMARY KEY,
+    etag TEXT NOT NULL,
+    reconciled_at REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS webhook_queue (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    doc_id TEXT NOT NULL,
+    payload TEXT NOT NULL,
+    attempts INTEGER NOT NULL DEFAULT 0,
+    next_attempt_at REAL NOT NULL,
+    locked_until REAL,
+    last_error TEXT,
+    created_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS webhook_queue_due ON webhook_queue (next_attempt_at);
+CREATE INDEX IF NOT EXISTS webhook_queue_doc ON webhook_queue (doc_id);
+CREATE TABLE IF NOT EXISTS google_quota_usage (
+    day TEXT PRIMARY KEY,
+    used INTEGER NOT NULL
+);
+CREATE TABLE IF NOT EXISTS leases (
+    name TEXT PRIMARY KEY,
+    owner TEXT NOT NULL,
+    expires_at REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS operation_journal (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    op_key TEXT NOT NULL UNIQUE,
+    doc_id TEXT NOT NULL,
+    kind TEXT NOT NULL,
+    payload TEXT NOT NULL,
+    state TEXT NOT NULL DEFAULT 'pending',
+    attempts INTEGER NOT NULL DEFAULT 0,
+    next_attempt_at REAL NOT NULL,
+    locked_until REAL,
+    last_error TEXT,
+    created_at REAL NOT NULL,
+    finished_at REAL
+);
+CREATE INDEX IF NOT EXISTS operation_journal_due ON operation_journal (state, next_attempt_at);
+CREATE INDEX IF NOT EXISTS operation_journal_doc ON operation_journal (doc_id, kind);
+CREATE TABLE IF NOT EXISTS webhook_dead_letter (
+    id INTEGER PRIMARY KEY,
+    doc_id TEXT NOT NULL,
+    payload TEXT NOT NULL,
+    attempts INTEGER NOT NULL,
+    last_error TEXT,
+    created_at REAL NOT NULL,
+    failed_at REAL NOT NULL
+);
+"""
+
+_state_local = threading.local()
+
+def get_state_db():
+    """Eine SQLite-Verbindung pro Thread und Mandant (WAL), damit Flask-Threads und Hintergrundjobs parallel lesen können."""
+    path = get_config("STATE_DB_PATH", current_tenant().default_path("state.db"))
+    conns = getattr(_state_local, "conns", None)
+    if conns is None:
+        conns = _state_local.conns = {}
+    conn = conns.get(path)
+    if conn is None:
+        conn = sqlite3.connect(path, timeout=30)
+        conn.row_factory = sqlite3.Row
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        conn.executescript(STATE_SCHEMA)
+        conns[path] = conn
+    return conn
+
+def get_state_value(key, default=None):
+    row = get_state_db().execute("SELECT value FROM state_meta WHERE key = ?", (key,)).fetchone()
+    return row["value"] if row else default
+
+def set_state_value(key, value):
+    conn = get_state_db()
+    with conn:
+        conn.execute(
+            "INSERT INTO state_meta (key, value) VALUES (?, ?) "
+            "ON CONFLICT(key) DO UPDATE SET value = excluded.value",
+            (key, value),
+        )
+
+# Kennung dieses Prozesses für Leases (mehrere Prozesse teilen sich die Zustandsdatei)
+PROCESS_ID = f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+
+def acquire_lease(name, ttl_seconds):
+    """Holt oder verlängert eine prozessübergreifende Lease; True, wenn dieser Prozess sie hält."""
+    conn = get_state_db()
+    now = time.time()
+    conn.execute("BEGIN IMMEDIATE")
+    try:
+        row = conn.execute("SELECT owner, expires_at FROM leases WHERE name = ?", (name,)).fetchone()
+        if row and row["owner"] != PROCESS_ID and row["expires_at"] > now:
+            conn.rollback()
+            return False
+        conn.execute(
+            "INSERT INTO leases (name, owner, expires_at) VALUES (?, ?, ?) "
+            "ON CONFLICT(name) DO UPDATE SET owner = excluded.owner, expires_at = excluded.expires_at",
+            (name, PROCESS_ID, now + ttl_seconds),
+        )
+        conn.commit()
+    except BaseException:
+        conn.rollback()
+        raise
+    return True
+
+def release_lease(name):
+    conn = get_state_db()
+    with conn:
+        conn.execute("DELETE FROM leases WHERE name = ? AND owner = ?", (name, PROCESS_ID))
+
 # ==== GOOGLE TASKS SERVICE ====
+# Zugangsdaten werden so früh erneuert, dass laufende Aufrufe nicht mit abgelaufenem Token starten
+TOKEN_REFRESH_MARGIN = datetime.timedelta(minutes=5)
+
+class TasksClientManager:
+    """Hält die Google-Zugangsdaten im Speicher und liefert je Thread einen eigenen Tasks-Service.
+
+    httplib2-Verbindungen sind nicht threadsicher, daher bekommt jeder Thread
+    (Flask-Requests, Hintergrundjobs) seinen eigenen Transport. Das
+    Discovery-Dokument wird einmal aus dem Paket geladen, ohne Netzwerkzugriff.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._local = threading.local()
+        self._creds = None
+        self._token_path = None
+        self._token_mtime = None
+        self._generation = 0
+        self._discovery_doc = None
+
+    def invalidate(self):
+        with self._lock:
+            self._creds = None
+            self._generation += 1
+
+    def _needs_refresh(self, creds):
+        if not creds.token:
+            return True
+        if creds.expiry is None:
+            return False
+        now = datetime.datetime.now(datetime.timezone.utc).replace(tzinfo=None)
+        return creds.expiry - TOKEN_REFRESH_MARGIN <= now
+
+    def credentials(self):
+        token_path = get_config("GOOGLE_TASKS_TOKEN", current_tenant().default_path("token.json"))
+        scopes = get_config("SCOPES")
+        with self._lock:
+            try:
+                mtime = os.stat(token_path).st_mtime_ns
+            except FileNotFoundError:
+                self._creds = None
+                raise TokenError("Token-Datei fehlt")
+            if self._creds is None or token_path != self._token_path or mtime != self._token_mtime:
+                try:
+                    self._creds = Credentials.from_authorized_user_file(token_path, scopes)
+                except Exception as e:
+                    raise TokenError("Token konnte nicht geladen werden") from e
+                self._token_path = token_path
+                self._token_mtime = mtime
+                self._generation += 1
+            creds = self._creds
+            if self._needs_refresh(creds):
+                if not creds.refresh_token:
+                    raise TokenError("Kein gültiges Token")
+                try:
+                    creds.refresh(Request())
+                    atomic_write_text(token_path, creds.to_json())
+                except Exception as e:
+                    raise TokenError("Token konnte nicht erneuert werden") from e
+                self._token_mtime = os.stat(token_path).st_mtime_ns
+            return creds, self._generation
+
+    def _discovery(self):
+        # GOOGLE_TASKS_ROOT_URL lenkt die API z.B. auf einen Proxy oder den Benchmark-Server um
+        root_url = get_config("GOOGLE_TASKS_ROOT_URL")
+        if self._discovery_doc is None or self._discovery_doc[0] != root_url:
+            doc = json.loads(get_static_doc("tasks", "v1"))
+            if root_url:
+                root_url = root_url.rstrip("/") + "/"
+                doc["rootUrl"] = root_url
+                doc["baseUrl"] = root_url + doc.get("servicePath", "")
+            self._discovery_doc = (root_url, doc)
+        return self._discovery_doc[1]
+
+    def service(self):
+        creds, generation = self.credentials()
+        local = self._local
+        if getattr(local, "generation", None) != generation:
+            http = httplib2.Http(timeout=get_config("GOOGLE_HTTP_TIMEOUT", 30))
+            local.service = build_from_document(self._discovery(), http=AuthorizedHttp(creds, http=http))
+            local.generation = generation
+        return local.service
+
+def get_tasks_client():
+    return current_tenant().resource("tasks_client", None, TasksClientManager)
+
 def get_tasks_service():
-    token_path = get_config("GOOGLE_TASKS_TOKEN", "token.json")
-    scopes = get_config("SCOPES")
-    if not os.path.exists(token_path):
-        raise TokenError("Token-Datei fehlt")
+    return get_tasks_client().service()
+
+class TokenBucket:
+    """Token-Bucket: rate Tokens pro Sekunde, höchstens capacity auf Vorrat; acquire() blockiert.
+
+    Mehr als capacity Tokens auf einmal (z.B. ein ganzer Batch) werden bei vollem
+    Bucket gewährt; der Stand wird dann negativ, und diese Schuld müssen
+    folgende Aufrufe abwarten. Über die Zeit bleibt es so bei rate.
+    """
+
+    def __init__(self, rate, capacity):
+        self.rate = float(rate)
+        self.capacity = float(capacity)
+        self._tokens = float(capacity)
+        self._last = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _refill(self):
+        now = time.monotonic()
+        self._tokens = min(self.capacity, self._tokens + (now - self._last) * self.rate)
+        self._last = now
+
+    def take(self, tokens=1, keep=0.0):
+        """Nimmt tokens, wenn danach noch keep übrig bleiben; sonst die voraussichtliche Wartezeit in Sekunden."""
+        needed = min(tokens, self.capacity)
+        keep = min(keep, self.capacity - needed)
+        with self._lock:
+            self._refill()
+            missing = needed + keep - self._tokens
+            if missing <= 0:
+                self._tokens -= tokens
+                return 0.0
+            return missing / self.rate
+
+    def acquire(self, tokens=1):
+        while True:
+            wait = self.take(tokens)
+            if not wait:
+                return
+            time.sleep(wait)
+
+    def set_rate(self, rate):
+        with self._lock:
+            self._refill()
+            self.rate = float(rate)
+
+    def available(self):
+        with self._lock:
+            self._refill()
+            return self._tokens
+
+class GoogleQuotaExceeded(Exception):
+    """Das Tageskontingent der Tasks-API ist (für diese Priorität) aufgebraucht."""
+    pass
+
+GOOGLE_PRIORITIES = ("interactive", "background")
+_google_priority = threading.local()
+
+@contextmanager
+def google_priority(priority):
+    """Priorität der Tasks-API-Aufrufe im aktuellen Thread; auch als Dekorator verwendbar."""
+    previous = current_google_priority()
+    _google_priority.value = priority
     try:
-        creds = Credentials.from_authorized_user_file(token_path, scopes)
-    except Exception as e:
-        raise TokenError("Token konnte nicht geladen werden") from e
+        yield
+    finally:
+        _google_priority.value = previous
+
+def current_google_priority():
+    return getattr(_google_priority, "value", "interactive")
 
-    if not creds.valid:
-        if creds.expired and creds.refresh_token:
+try:
+    from zoneinfo import ZoneInfo
+    # Google setzt das Tageskontingent um Mitternacht pazifischer Zeit zurück
+    GOOGLE_QUOTA_TZ = ZoneInfo("America/Los_Angeles")
+except Exception:
+    GOOGLE_QUOTA_TZ = datetime.timezone(datetime.timedelta(hours=-8))
+
+class GoogleQuotaGovernor:
+    """Zentrale Drosselung aller Tasks-API-Aufrufe.
+
+    Das Minutenkontingent ist ein Token-Bucket, das Tageskontingent wird in der
+    Zustands-DB gezählt, damit sich Web- und Worker-Prozesse ein Budget teilen.
+    Aufrufe aus Webhooks und der Oberfläche ("interactive") haben Vorrang:
+    Hintergrundjobs ("background") warten, solange interaktive Aufrufe anstehen,
+    und lassen einen Anteil (reserve) beider Kontingente übrig. Meldet Google
+    429/rateLimitExceeded, pausieren alle Aufrufe kurz und die Rate wird
+    halbiert; mit jedem Erfolg steigt sie wieder bis zum konfigurierten Wert.
+    """
+
+    def __init__(self, per_minute, per_day, burst, reserve):
+        self.per_minute = per_minute
+        self.per_day = per_day
+        self.reserve = reserve
+        self.max_rate = per_minute / 60.0
+        self.bucket = TokenBucket(self.max_rate, burst)
+        self._cond = threading.Condition()
+        self._waiting = {p: 0 for p in GOOGLE_PRIORITIES}
+        self._paused_until = 0.0
+        self.throttled_count = 0
+
+    @staticmethod
+    def quota_day():
+        return datetime.datetime.now(GOOGLE_QUOTA_TZ).date().isoformat()
+
+    def _reserve_daily(self, tokens, priority):
+        limit = self.per_day
+        if priority == "background":
+            limit = int(self.per_day * (1 - self.reserve))
+        day = self.quota_day()
+        conn = get_state_db()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            row = conn.execute("SELECT used FROM google_quota_usage WHERE day = ?", (day,)).fetchone()
+            used = row["used"] if row else 0
+            if used + tokens > limit:
+                conn.rollback()
+                raise GoogleQuotaExceeded(
+                    f"Tageskontingent erreicht ({used}/{self.per_day}, Priorität {priority})"
+                )
+            if row is None:
+                conn.execute("DELETE FROM google_quota_usage WHERE day < ?", (day,))
+            conn.execute(
+                "INSERT INTO google_quota_usage (day, used) VALUES (?, ?) "
+                "ON CONFLICT(day) DO UPDATE SET used = used + excluded.used",
+                (day, tokens),
+            )
+            conn.commit()
+        except BaseException:
+            if conn.in_transaction:
+                conn.rollback()
+            raise
+
+    def daily_used(self):
+        row = get_state_db().execute(
+            "SELECT used FROM google_quota_usage WHERE day = ?", (self.quota_day(),)
+        ).fetchone()
+        return row["used"] if row else 0
+
+    def acquire(self, tokens=1, priority=None):
+        """Blockiert, bis tokens Aufrufe erlaubt sind; GoogleQuotaExceeded, wenn das Tageskontingent fehlt."""
+        priority = priority or current_google_priority()
+        background = priority == "background"
+        self._reserve_daily(tokens, priority)
+        keep = self.bucket.capacity * self.reserve if background else 0.0
+        with self._cond:
+            self._waiting[priority] += 1
             try:
-                creds.refresh(Request())
-                with open(token_path, "w") as f:
-                    f.write(creds.to_json())
-            except Exception as e:
-                raise TokenError("Token konnte nicht erneuert werden") from e
+                while True:
+                    wait = self._paused_until - time.monotonic()
+                    if wait <= 0 and background and self._waiting["interactive"]:
+                        wait = 0.05
+                    if wait <= 0:
+                        wait = self.bucket.take(tokens, keep)
+                        if not wait:
+                            return
+                    self._cond.wait(min(wait, 1.0))
+            finally:
+                self._waiting[priority] -= 1
+                self._cond.notify_all()
+
+    def throttled(self, retry_after=None):
+        """Google hat gedrosselt: alle Aufrufe pausieren, die Rate wird halbiert."""
+        with self._cond:
+            self.throttled_count += 1
+            self.bucket.set_rate(max(self.max_rate / 16, self.bucket.rate / 2))
+            self._paused_until = max(self._paused_until, time.monotonic() + (retry_after or 1.0))
+        metrics.inc("paperless_tasks_google_throttled_total")
+
+    def succeeded(self, tokens=1):
+        if self.bucket.rate < self.max_rate:
+            self.bucket.set_rate(min(self.max_rate, self.bucket.rate + tokens * self.max_rate / 20))
+
+    def exhausted(self):
+        """Google meldet das Tageslimit; bis zum Tageswechsel keine weiteren Aufrufe."""
+        conn = get_state_db()
+        with conn:
+            conn.execute(
+                "INSERT INTO google_quota_usage (day, used) VALUES (?, ?) "
+                "ON CONFLICT(day) DO UPDATE SET used = MAX(used, excluded.used)",
+                (self.quota_day(), self.per_day),
+            )
+
+    def stats(self):
+        used = self.daily_used()
+        with self._cond:
+            paused = max(0.0, self._paused_until - time.monotonic())
+            waiting = dict(self._waiting)
+        return {
+            "per_minute": self.per_minute,
+            "effective_per_minute": round(self.bucket.rate * 60, 1),
+            "tokens_available": round(self.bucket.available(), 1),
+            "daily_limit": self.per_day,
+            "daily_used": used,
+            "daily_remaining": max(0, self.per_day - used),
+            "throttled": self.throttled_count,
+            "paused_seconds": round(paused, 1),
+            "waiting": waiting,
+        }
+
+def get_google_quota():
+    # Das Kontingent gilt je Google-Konto, also je Mandant
+    config = get_config_snapshot()
+    key = (
+        config.get("GOOGLE_QUOTA_PER_MINUTE", config.get("GOOGLE_RATE_PER_SECOND", 5) * 60),
+        config.get("GOOGLE_QUOTA_PER_DAY", 50000),
+        config.get("GOOGLE_RATE_BURST", 20),
+        config.get("GOOGLE_QUOTA_BACKGROUND_RESERVE", 0.2),
+    )
+    return current_tenant().resource("google_quota", key, lambda: GoogleQuotaGovernor(*key))
+
+def google_backoff(attempt, retry_after=None):
+    """Exponentielles Backoff mit vollem Jitter; ein Retry-After von Google hat Vorrang."""
+    if retry_after:
+        return retry_after
+    base = get_config("GOOGLE_BACKOFF_BASE_SECONDS", 1.0)
+    cap = get_config("GOOGLE_BACKOFF_MAX_SECONDS", 60)
+    return random.uniform(0, min(cap, base * 2 ** attempt))
+
+def _retry_after(exc):
+    resp = getattr(exc, "resp", None)
+    value = resp.get("retry-after") if resp is not None else None
+    try:
+        return min(float(value), 300.0) if value else None
+    except ValueError:
+        return None
+
+def _timed_execute(req, method):
+    started = time.perf_counter()
+    status = "ok"
+    try:
+        return req.execute()
+    except HttpError as e:
+        status = e.resp.status
+        raise
+    except Exception:
+        status = "error"
+        raise
+    finally:
+        metrics.observe("paperless_tasks_google_request_seconds", time.perf_counter() - started, method=method)
+        metrics.inc("paperless_tasks_google_requests_total", method=method, status=status)
+        count_call("google")
+
+def execute_google(req, priority=None):
+    """Führt einen Tasks-API-Aufruf über den Quota-Governor aus.
+
+    Gedrosselte Aufrufe (429/rateLimitExceeded) und bei lesenden/idempotenten
+    Aufrufen auch 5xx und Verbindungsfehler werden mit Backoff wiederholt,
+    höchstens GOOGLE_RETRIES-mal.
+    """
+    method = getattr(req, "methodId", None) or "unknown"
+    idempotent = not method.endswith(".insert")
+    retries = get_config("GOOGLE_RETRIES", 5)
+    governor = get_google_quota()
+    for attempt in itertools.count():
+        governor.acquire(1, priority)
+        try:
+            result = _timed_execute(req, method)
+        except HttpError as e:
+            if _is_daily_limit_error(e):
+                governor.exhausted()
+                raise GoogleQuotaExceeded("Google meldet: Tageskontingent erreicht") from e
+            retry_after = _retry_after(e)
+            if _is_rate_limit_error(e):
+                governor.throttled(retry_after)
+            if attempt >= retries or not _is_retryable_http_error(e, idempotent):
+                raise
+            delay = google_backoff(attempt, retry_after)
+        except (OSError, httplib2.HttpLib2Error):
+            if attempt >= retries or not idempotent:
+                raise
+            delay = google_backoff(attempt)
         else:
-            raise TokenError("Kein gültiges Token")
+            governor.succeeded()
+            return result
+        logger.warning(f"Google-Aufruf {method} wird in {delay:.1f}s wiederholt (Versuch {attempt + 1}).")
+        time.sleep(delay)
+
+# Nur die Felder, die hier ausgewertet werden; spart Übertragung bei großen Listen
+TASK_FIELDS = "id,etag,title,notes,status,completed,updated,deleted"
+TASK_PAGE_SIZE = 100
+
+def iter_task_lists(service):
+    """Liefert alle Task-Listen seitenweise (nextPageToken) als Generator."""
+    page_token = None
+    while True:
+        resp = execute_google(service.tasklists().list(
+            maxResults=TASK_PAGE_SIZE, pageToken=page_token, fields="items(id,title),nextPageToken"
+        ))
+        yield from resp.get('items', [])
+        page_token = resp.get('nextPageToken')
+        if not page_token:
+            return
 
-    return build('tasks', 'v1', credentials=creds)
+def iter_tasks(service, tasklist_id, **params):
+    """Liefert alle Tasks einer Liste seitenweise; bricht der Aufrufer ab, werden keine weiteren Seiten geladen."""
+    params.setdefault('showCompleted', True)
+    params.setdefault('showHidden', True)
+    page_token = None
+    while True:
+        resp = execute_google(service.tasks().list(
+            tasklist=tasklist_id, maxResults=TASK_PAGE_SIZE, pageToken=page_token,
+            fields=f"items({TASK_FIELDS}),nextPageToken", **params
+        ))
+        yield from resp.get('items', [])
+        page_token = resp.get('nextPageToken')
+        if not page_token:
+            return
 
 def fetch_task_lists():
-    service = get_tasks_service()
-    return service.tasklists().list().execute().get('items', [])
+    return list(iter_task_lists(get_tasks_service()))
 
 # ==== PAPERLESS API HELPER ====
+class PaperlessError(Exception):
+    """Fehlgeschlagener Paperless-Aufruf; status ist None, wenn Paperless nicht erreichbar war."""
 
-def fetch_custom_fields():
-    api_url = f"{get_config('PAPERLESS_URL')}/api/custom_fields/"
-    headers = {"Authorization": f"Token {get_config('PAPERLESS_TOKEN')}"}
-    try:
-        resp = requests.get(api_url, headers=headers)
-        if resp.status_code != 200:
-            print("Fehler beim Abrufen der Custom Fields:", resp.text)
-            return []
+    def __init__(self, message, status=None):
+        super().__init__(message)
+        self.status = status
+
+class PaperlessClient:
+    """Gemeinsame HTTP-Verbindung zu Paperless.
+
+    Eine requests.Session mit Connection-Pool (Keep-Alive), festen Connect-/Read-Timeouts
+    und begrenzten Wiederholungen mit Backoff bei 429/5xx. Je Endpunkt werden
+    Anzahl, Fehler und Latenz mitgezählt.
+    """
+
+    RETRY_STATUS = (429, 500, 502, 503, 504)
+
+    def __init__(self, base_url, token, connect_timeout=5, read_timeout=30,
+                 retries=3, backoff=0.5, pool_size=10):
+        self.base_url = base_url.rstrip("/")
+        self.timeout = (connect_timeout, read_timeout)
+        retry = Retry(
+            total=retries,
+            backoff_factor=backoff,
+            status_forcelist=self.RETRY_STATUS,
+            allowed_methods=frozenset({"GET", "HEAD", "PATCH"}),
+            respect_retry_after_header=True,
+            raise_on_status=False,
+        )
+        adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size, max_retries=retry)
+        self.session = requests.Session()
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+        self.session.headers["Authorization"] = f"Token {token}"
+        self._stats_lock = threading.Lock()
+        self._stats = {}
+
+    @staticmethod
+    def endpoint_name(path):
+        return re.sub(r"/\d+(?=/|$)", "/{id}", path.split("?", 1)[0])
+
+    def _record(self, method, path, seconds, ok):
+        key = f"{method} {self.endpoint_name(path)}"
+        with self._stats_lock:
+            stat = self._stats.setdefault(key, {"count": 0, "errors": 0, "total_seconds": 0.0, "max_seconds": 0.0})
+            stat["count"] += 1
+            stat["total_seconds"] += seconds
+            stat["max_seconds"] = max(stat["max_seconds"], seconds)
+            if not ok:
+                stat["errors"] += 1
+
+    def stats(self):
+        with self._stats_lock:
+            return {
+                key: dict(stat, avg_seconds=stat["total_seconds"] / stat["count"])
+                for key, stat in self._stats.items()
+            }
+
+    def request(self, method, path, **kwargs):
+        kwargs.setdefault("timeout", self.timeout)
+        started = time.perf_counter()
+        ok = False
+        status = "error"
+        try:
+            resp = self.session.request(method, f"{self.base_url}{path}", **kwargs)
+            ok = resp.status_code < 400
+            status = resp.status_code
+            return resp
+        finally:
+            seconds = time.perf_counter() - started
+            self._record(method, path, seconds, ok)
+            endpoint = self.endpoint_name(path)
+            metrics.observe("paperless_tasks_paperless_request_seconds", seconds, method=method, endpoint=endpoint)
+            metrics.inc("paperless_tasks_paperless_requests_total", method=method, endpoint=endpoint, status=status)
+            count_call("paperless")
+
+    def get(self, path, **kwargs):
+        return self.request("GET", path, **kwargs)
+
+    def patch(self, path, **kwargs):
+        return self.request("PATCH", path, **kwargs)
+
+def get_paperless_client():
+    """Liefert den Client des Mandanten; bei geänderter URL/Token/Timeouts wird er neu aufgebaut."""
+    config = get_config_snapshot()
+    key = (
+        config.get("PAPERLESS_URL"),
+        config.get("PAPERLESS_TOKEN"),
+        config.get("PAPERLESS_CONNECT_TIMEOUT", 5),
+        config.get("PAPERLESS_READ_TIMEOUT", 30),
+        config.get("PAPERLESS_RETRIES", 3),
+    )
+    return current_tenant().resource("paperless_client", key, lambda: PaperlessClient(
+        key[0], key[1], connect_timeout=key[2], read_timeout=key[3], retries=key[4]
+    ))
+
+def iter_paperless_results(path, params=None, start_page=1):
+    """Blättert durch einen Paperless-Listen-Endpunkt und liefert (seite, eintrag)."""
+    client = get_paperless_client()
+    page = start_page
+    while True:
+        resp = client.get(path, params=dict(params or {}, page=page))
+        if resp.status_code == 404 and page > 1:
+            return
+        resp.raise_for_status()
         data = resp.json()
-        return data.get('results', data)
-    except Exception as e:
-        print("Fehler beim Abrufen der Custom Fields:", e)
-        return []
+        if isinstance(data, list):
+            yield from ((page, item) for item in data)
+            return
+        for item in data.get("results", []):
+            yield page, item
+        if not data.get("next"):
+            return
+        page += 1
 
-def fetch_custom_field(field_id):
-    api_url = f"{get_config('PAPERLESS_URL')}/api/custom_fields/{field_id}/"
-    headers = {"Authorization": f"Token {get_config('PAPERLESS_TOKEN')}"}
-    try:
-        resp = requests.get(api_url, headers=headers)
-        if resp.status_code != 200:
-            print("Fehler beim Abrufen von Custom Field:", resp.text)
+class PaperlessLookups:
+    """Namen von Korrespondenten, Dokumenttypen, Tags und Custom Fields im Speicher.
+
+    Jede Tabelle wird komplett über den Listen-Endpunkt geladen und nach
+    LOOKUP_REFRESH_MINUTES oder bei einer unbekannten ID neu geholt, sodass
+    Notizen und /config ohne zusätzliche Aufrufe je Request auskommen.
+    Zwischen zwei Ladeversuchen einer Tabelle liegen (auch nach Fehlern)
+    mindestens MISS_REFRESH_SECONDS.
+    """
+
+    RESOURCES = {
+        "correspondents": "/api/correspondents/",
+        "document_types": "/api/document_types/",
+        "tags": "/api/tags/",
+        "custom_fields": "/api/custom_fields/",
+    }
+    MISS_REFRESH_SECONDS = 30
+
+    def __init__(self, refresh_seconds):
+        self.refresh_seconds = refresh_seconds
+        self._tables = {}
+        self._loaded_at = {}
+        self._last_attempt = {}
+        self._lock = threading.Lock()
+
+    def refresh(self, resource, raise_errors=False):
+        requested_at = time.monotonic()
+        with self._lock:
+            # Ein anderer Thread hat währenddessen schon neu geladen
+            if self._loaded_at.get(resource, float("-inf")) > requested_at and resource in self._tables:
+                return self._tables[resource]
+            if self._last_attempt.get(resource, float("-inf")) > requested_at and not raise_errors:
+                return self._tables.get(resource, {})
+            self._last_attempt[resource] = time.monotonic()
+            try:
+                items = [item for _, item in iter_paperless_results(
+                    self.RESOURCES[resource], {"page_size": 1000}
+                )]
+            except Exception as e:
+                logger.error("Fehler beim Abrufen von %s: %s", resource, e)
+                if raise_errors:
+                    raise
+                return self._tables.get(resource, {})
+            table = {item["id"]: item for item in items if "id" in item}
+            self._tables[resource] = table
+            self._loaded_at[resource] = time.monotonic()
+            return table
+
+    def _may_retry(self, resource):
+        last_attempt = self._last_attempt.get(resource)
+        return last_attempt is None or time.monotonic() - last_attempt > self.MISS_REFRESH_SECONDS
+
+    def table(self, resource):
+        loaded_at = self._loaded_at.get(resource)
+        expired = loaded_at is None or time.monotonic() - loaded_at > self.refresh_seconds
+        if expired and self._may_retry(resource):
+            return self.refresh(resource)
+        return self._tables.get(resource, {})
+
+    def get(self, resource, item_id):
+        if item_id is None:
             return None
-        return resp.json()
-    except Exception as e:
-        print("Fehler beim Abrufen von Custom Field:", e)
-        return None
+        item = self.table(resource).get(item_id)
+        if item is None and self._may_retry(resource):
+            item = self.refresh(resource).get(item_id)
+        return item
+
+    def name(self, resource, item_id):
+        item = self.get(resource, item_id)
+        if item is None:
+            return item_id
+        return item.get("name") or item.get("label") or item_id
 
-def get_status_mapping_from_field(field_id):
-    field = fetch_custom_field(field_id)
+    def all(self, resource):
+        return list(self.table(resource).values())
+
+def get_paperless_lookups():
+    key = (get_config("PAPERLESS_URL"), get_config("PAPERLESS_TOKEN"), get_config("LOOKUP_REFRESH_MINUTES", 60))
+    return current_tenant().resource("paperless_lookups", key, lambda: PaperlessLookups(key[2] * 60))
+
+def refresh_custom_fields():
+    """Custom Fields direkt von Paperless; aktualisiert dabei auch die Namens-Tabelle."""
+    return list(get_paperless_lookups().refresh("custom_fields", raise_errors=True).values())
+
+def status_mapping_from_field(field):
     if not field:
         return {}
     choices = field.get('choices') or field.get('options') or []
     return {c.get('label'): c.get('id') for c in choices if 'label' in c and 'id' in c}
-def get_document_meta_by_id(doc_id):
-    api_url = f"{get_config('PAPERLESS_URL')}/api/documents/{doc_id}/"
-    headers = {"Authorization": f"Token {get_config('PAPERLESS_TOKEN')}"}
-    resp = requests.get(api_url, headers=headers)
+
+class DocumentCache:
+    """Begrenzter TTL+LRU-Cache für Dokument-JSON aus Paperless, Schlüssel ist die doc_id.
+
+    Im Revalidierungsmodus wird ein abgelaufener Eintrag mit If-None-Match /
+    If-Modified-Since nachgefragt, sofern Paperless ETag bzw. Last-Modified
+    mitgeliefert hat; bei 304 bleibt der Eintrag gültig.
+    """
+
+    def __init__(self, max_entries, ttl, revalidate=False):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.revalidate = revalidate
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()  # doc_id -> (dokument, geladen_um, validatoren)
+        self.counters = {"hits": 0, "misses": 0, "evictions": 0, "revalidated": 0, "invalidations": 0}
+
+    def _count(self, name):
+        self.counters[name] += 1
+
+    def lookup(self, doc_id):
+        """(dokument, validatoren); dokument ist None, wenn neu geladen werden muss."""
+        key = str(doc_id)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self._count("misses")
+                return None, None
+            doc, fetched_at, validators = entry
+            if time.monotonic() - fetched_at < self.ttl:
+                self._entries.move_to_end(key)
+                self._count("hits")
+                return copy.deepcopy(doc), validators
+            self._count("misses")
+            if self.revalidate and validators:
+                return None, validators
+            del self._entries[key]
+            return None, None
+
+    def validators(self, doc_id):
+        """Validatoren eines Eintrags unabhängig vom Alter (für bedingte GETs vor Schreibzugriffen)."""
+        with self._lock:
+            entry = self._entries.get(str(doc_id))
+            return entry[2] if entry else None
+
+    def put(self, doc_id, doc, validators=None):
+        key = str(doc_id)
+        with self._lock:
+            self._entries[key] = (copy.deepcopy(doc), time.monotonic(), validators or {})
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self._count("evictions")
+
+    def touch(self, doc_id):
+        # Nach 304: Eintrag ist weiterhin aktuell
+        key = str(doc_id)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            self._entries[key] = (entry[0], time.monotonic(), entry[2])
+            self._entries.move_to_end(key)
+            self._count("revalidated")
+            return copy.deepcopy(entry[0])
+
+    def invalidate(self, doc_id):
+        with self._lock:
+            if self._entries.pop(str(doc_id), None) is not None:
+                self._count("invalidations")
+
+    def stats(self):
+        with self._lock:
+            return dict(self.counters, entries=len(self._entries), max_entries=self.max_entries)
+
+def get_document_cache():
+    """Dokument-Cache des Mandanten; None, wenn DOCUMENT_CACHE_SIZE 0 ist."""
+    key = (
+        get_config("DOCUMENT_CACHE_SIZE", 1000),
+        get_config("DOCUMENT_CACHE_TTL", 60),
+        get_config("DOCUMENT_CACHE_REVALIDATE", False),
+    )
+    return current_tenant().resource(
+        "document_cache", key, lambda: DocumentCache(*key) if key[0] > 0 else None
+    )
+
+def invalidate_document(doc_id):
+    """Verwirft alle lokal zwischengespeicherten Stände eines Dokuments."""
+    cache = get_document_cache()
+    if cache is not None:
+        cache.invalidate(doc_id)
+    pdf_cache = get_pdf_cache()
+    if pdf_cache is not None:
+        pdf_cache.invalidate(doc_id)
+
+def get_document_meta_by_id(doc_id, fresh=False, raise_errors=False):
+    """Dokument-JSON, ggf. aus dem Cache.
+
+    Mit fresh=True wird immer bei Paperless nachgefragt (bedingt, wenn der
+    Cache Validatoren hat); das ist vor Schreibzugriffen nötig, weil ein
+    PATCH die komplette Custom-Field-Liste überschreibt. Fehler ergeben None,
+    mit raise_errors=True eine PaperlessError.
+    """
+    cache = get_document_cache()
+    validators = None
+    if cache is not None:
+        if fresh:
+            validators = cache.validators(doc_id)
+        else:
+            doc, validators = cache.lookup(doc_id)
+            if doc is not None:
+                return doc
+    headers = {}
+    if validators:
+        if validators.get("etag"):
+            headers["If-None-Match"] = validators["etag"]
+        if validators.get("last_modified"):
+            headers["If-Modified-Since"] = validators["last_modified"]
+    try:
+        resp = get_paperless_client().get(f"/api/documents/{doc_id}/", headers=headers)
+        if resp.status_code == 304:
+            doc = cache.touch(doc_id)
+            if doc is not None:
+                return doc
+            # Eintrag inzwischen verdrängt: ohne Bedingung neu laden
+            resp = get_paperless_client().get(f"/api/documents/{doc_id}/")
+    except requests.RequestException as e:
+        logger.error("Paperless-API nicht erreichbar: %s", e, extra={"doc_id": doc_id})
+        if raise_errors:
+            raise PaperlessError(str(e)) from e
+        return None
     if resp.status_code != 200:
-        print("Paperless-API Fehler:", resp.text)
+        logger.error("Paperless-API Fehler: %s", resp.text, extra={"doc_id": doc_id})
+        if raise_errors:
+            raise PaperlessError(f"Dokument {doc_id}: HTTP {resp.status_code}", resp.status_code)
         return None
-    return resp.json()
+    doc = resp.json()
+    if cache is not None:
+        cache.put(doc_id, doc, {
+            "etag": resp.headers.get("ETag"),
+            "last_modified": resp.headers.get("Last-Modified"),
+        })
+    return doc
 
 def get_document_meta(doc_url=None, doc_id=None):
     if doc_id:
@@ -144,11 +1319,11 @@ def get_document_meta(doc_url=None, doc_id=None):
     if doc_url:
         match = re.search(r'/documents/(\d+)/', doc_url)
         if not match:
-            print("Konnte Dokumenten-ID nicht extrahieren!")
+            logger.warning("Konnte Dokumenten-ID nicht extrahieren!")
             return None
         doc_id = match.group(1)
         return get_document_meta_by_id(doc_id)
-    print("Weder doc_url noch doc_id angegeben!")
+    logger.warning("Weder doc_url noch doc_id angegeben!")
     return None
 
 def get_bearbeitet_am(doc):
@@ -159,13 +1334,14 @@ def get_bearbeitet_am(doc):
     return None
 
 def get_bearbeitungsstatus(doc):
-    cf_status = get_config("CUSTOM_FIELD_STATUS")
-    status_id_to_label = {v: k for k, v in get_config("STATUS_LABEL_TO_ID").items()}
+    config = get_config_snapshot()
+    cf_status = config.get("CUSTOM_FIELD_STATUS")
+    status_id_to_label = config.status_id_to_label
     for cf in doc.get('custom_fields', []):
         if cf['field'] == cf_status:
             value = cf['value']
             return status_id_to_label.get(value, value)
-    return get_config("STATUS_LABEL_NEW", "Unbearbeitet")
+    return config.get("STATUS_LABEL_NEW", "Unbearbeitet")
 
 def get_aktion_wert(doc):
     cf_aktion = get_config("CUSTOM_FIELD_AKTION")
@@ -177,155 +1353,663 @@ def get_aktion_wert(doc):
                 return 0
     return 0
 
-def set_bearbeitet_am(doc_id, datum):
-    api_url = f"{get_config('PAPERLESS_URL')}/api/documents/{doc_id}/"
-    headers = {"Authorization": f"Token {get_config('PAPERLESS_TOKEN')}"}
-    resp = requests.get(api_url, headers=headers)
-    if resp.status_code != 200:
-        print(f"Fehler beim Abrufen von Dokument {doc_id}: {resp.text}")
-        return False
-    doc = resp.json()
-    custom_fields = doc.get('custom_fields', [])
-    cf_bearbeitet = get_config("CUSTOM_FIELD_BEARBEITET", 3)
+def update_custom_fields(doc_id, changes, doc=None, raise_errors=False):
+    """Setzt mehrere Custom Fields ({field_id: wert}) mit genau einem PATCH.
+
+    Ist das Dokument gerade frisch geladen worden, wird es übergeben und kein
+    weiteres GET ausgeführt; sonst wird es am Cache vorbei geholt, damit keine
+    zwischenzeitlichen Änderungen anderer Felder überschrieben werden. Sind
+    alle Werte schon gesetzt, entfällt auch der PATCH.
+    Rückgabe ist das aktualisierte Dokument oder None bei Fehlern (mit
+    raise_errors=True stattdessen eine PaperlessError).
+    """
+    if doc is None:
+        doc = get_document_meta_by_id(doc_id, fresh=True, raise_errors=raise_errors)
+        if not doc:
+            logger.error(f"Fehler beim Abrufen von Dokument {doc_id}", extra={"doc_id": doc_id})
+            return None
+    custom_fields = [dict(cf) for cf in doc.get('custom_fields', [])]
+    pending = dict(changes)
+    changed = False
     for cf in custom_fields:
-        if cf['field'] == cf_bearbeitet:
-            cf['value'] = datum
-    payload = {'custom_fields': custom_fields}
-    patch_resp = requests.patch(api_url, headers=headers, json=payload)
+        if cf['field'] in pending:
+            value = pending.pop(cf['field'])
+            if cf['value'] != value:
+                cf['value'] = value
+                changed = True
+    for field, value in pending.items():
+        custom_fields.append({'field': field, 'value': value})
+        changed = True
+    if not changed:
+        return doc
+    try:
+        patch_resp = get_paperless_client().patch(
+            f"/api/documents/{doc_id}/", json={'custom_fields': custom_fields}
+        )
+    except requests.RequestException as e:
+        logger.error(f"Fehler beim Schreiben von Dokument {doc_id}: {e}", extra={"doc_id": doc_id})
+        if raise_errors:
+            raise PaperlessError(str(e)) from e
+        return None
     if patch_resp.status_code != 200:
-        print(f"Fehler beim Setzen von bearbeitet_am: {patch_resp.text}")
-        return False
-    print(f"Erledigt: Dokument {doc_id} wurde als bearbeitet markiert ({datum})")
-    return True
+        logger.error(f"Fehler beim Setzen der Custom Fields von Dokument {doc_id}: {patch_resp.text}", extra={"doc_id": doc_id})
+        invalidate_document(doc_id)
+        if raise_errors:
+            raise PaperlessError(f"Dokument {doc_id}: HTTP {patch_resp.status_code}", patch_resp.status_code)
+        return None
+    updated = patch_resp.json()
+    # Die PATCH-Antwort ist der neueste Stand; ETag/Last-Modified sind damit veraltet
+    cache = get_document_cache()
+    if cache is not None:
+        cache.put(doc_id, updated)
+    return updated
 
-def set_bearbeitungsstatus(doc_id, status_label):
-    api_url = f"{get_config('PAPERLESS_URL')}/api/documents/{doc_id}/"
-    headers = {"Authorization": f"Token {get_config('PAPERLESS_TOKEN')}"}
-    resp = requests.get(api_url, headers=headers)
-    if resp.status_code != 200:
-        print(f"Fehler beim Abrufen von Dokument {doc_id}: {resp.text}")
-        return False
-    doc = resp.json()
-    custom_fields = doc.get('custom_fields', [])
-    found = False
-    status_id = get_config("STATUS_LABEL_TO_ID").get(status_label)
+def set_bearbeitungsstatus(doc_id, status_label, doc=None, raise_errors=False):
+    status_id = get_config_snapshot().status_label_to_id.get(status_label)
     if not status_id:
-        print(f"Unbekannter Status: {status_label}")
+        logger.warning(f"Unbekannter Status: {status_label}", extra={"doc_id": doc_id})
+        if raise_errors:
+            raise ValueError(f"Unbekannter Status: {status_label}")
         return False
     cf_status = get_config("CUSTOM_FIELD_STATUS")
-    for cf in custom_fields:
-        if cf['field'] == cf_status:
-            cf['value'] = status_id
-            found = True
-    if not found:
-        custom_fields.append({'field': cf_status, 'value': status_id})
-    payload = {'custom_fields': custom_fields}
-    patch_resp = requests.patch(api_url, headers=headers, json=payload)
-    if patch_resp.status_code != 200:
-        print(f"Fehler beim Setzen von Bearbeitungsstatus: {patch_resp.text}")
+    if update_custom_fields(doc_id, {cf_status: status_id}, doc=doc, raise_errors=raise_errors) is None:
         return False
-    print(f"Bearbeitungsstatus für Dokument {doc_id} auf '{status_label}' gesetzt")
+    logger.info(f"Bearbeitungsstatus für Dokument {doc_id} auf '{status_label}' gesetzt", extra={"doc_id": doc_id})
     return True
 
+def set_bearbeitungsstatus_und_datum(doc_id, status_label, datum, doc=None, raise_errors=False):
+    """Status und bearbeitet_am gemeinsam setzen (ein GET höchstens, ein PATCH)."""
+    config = get_config_snapshot()
+    status_id = config.status_label_to_id.get(status_label)
+    if not status_id:
+        logger.warning(f"Unbekannter Status: {status_label}", extra={"doc_id": doc_id})
+        if raise_errors:
+            raise ValueError(f"Unbekannter Status: {status_label}")
+        return None
+    changes = {
+        config.get("CUSTOM_FIELD_BEARBEITET", 3): datum,
+        config.get("CUSTOM_FIELD_STATUS"): status_id,
+    }
+    updated = update_custom_fields(doc_id, changes, doc=doc, raise_errors=raise_errors)
+    if updated is not None:
+        logger.info(f"Bearbeitungsstatus für Dokument {doc_id} auf '{status_label}' gesetzt (bearbeitet am {datum})", extra={"doc_id": doc_id})
+    return updated
+
+# ==== TASK-NOTIZEN ====
+# Aufbau einer Notiz: "Schlüssel: Wert"-Zeilen in fester Reihenfolge, danach
+# eigener Text aus Google Tasks und als letzte Zeile die Formatversion.
+NOTE_FORMAT_VERSION = 1
+NOTE_FIELDS = (
+    ("status", "Status"),
+    ("status_link", "Status bearbeiten"),
+    ("doc_type", "Typ"),
+    ("correspondent", "Person"),
+    ("added", "Hinzugefügt am"),
+    ("web_link", "Web-Ansicht"),
+    ("pdf_link", "PDF-Ansicht"),
+    ("doc_id", "Dokument-ID"),
+)
+NOTE_VERSION_LABEL = "Notizformat"
+_NOTE_LABEL_TO_FIELD = {label: field for field, label in NOTE_FIELDS}
+_NOTE_LINE = re.compile(r"([^:\n]{1,40}):[ \t]*(.*?)[ \t]*")
+_NOTE_STATUS = re.compile(r"(.*?)(?:[ \t]*\(am (\d{4}-\d{2}-\d{2})\))?")
+# Nur für Altnotizen, in denen die Angaben nicht am Zeilenanfang stehen
+_LEGACY_DOC_ID = re.compile(r"Dokument-ID: (\d+)")
+
+class TaskNote:
+    """Inhalt einer Task-Notiz; wird nicht verändert, sondern per replace() kopiert."""
+
+    __slots__ = ("version", "status", "date", "status_link", "doc_type", "correspondent",
+                 "added", "web_link", "pdf_link", "doc_id", "extra")
+
+    def __init__(self, version=NOTE_FORMAT_VERSION, status=None, date=None, status_link=None,
+                 doc_type=None, correspondent=None, added=None, web_link=None, pdf_link=None,
+                 doc_id=None, extra=()):
+        self.version = version
+        self.status = status
+        self.date = date
+        self.status_link = status_link
+        self.doc_type = doc_type
+        self.correspondent = correspondent
+        self.added = added
+        self.web_link = web_link
+        self.pdf_link = pdf_link
+        self.doc_id = None if doc_id is None else str(doc_id)
+        self.extra = tuple(extra)
+
+    def replace(self, **changes):
+        values = {name: getattr(self, name) for name in self.__slots__}
+        values.update(changes)
+        return TaskNote(**values)
+
+    def render(self):
+        lines = []
+        for field, label in NOTE_FIELDS:
+            value = getattr(self, field)
+            if value is None:
+                continue
+            if field == "status" and self.date:
+                value = f"{value} (am {self.date})"
+            lines.append(f"{label}: {value}")
+        lines.extend(self.extra)
+        lines.append(f"{NOTE_VERSION_LABEL}: {NOTE_FORMAT_VERSION}")
+        return "\n".join(lines)
+
+    def __repr__(self):
+        return f"TaskNote(doc_id={self.doc_id!r}, status={self.status!r}, date={self.date!r})"
+
+@lru_cache(maxsize=4096)
+def parse_task_note(notes):
+    """Zerlegt eine Task-Notiz in einem Durchlauf; liest auch Freitext-Notizen älterer Versionen."""
+    values = {}
+    extra = []
+    version = 0
+    for line in (notes or "").splitlines():
+        match = _NOTE_LINE.fullmatch(line)
+        if match:
+            label, value = match.groups()
+            field = _NOTE_LABEL_TO_FIELD.get(label.strip())
+            if field and field not in values:
+                values[field] = value
+                continue
+            if label == NOTE_VERSION_LABEL and value.isdigit():
+                version = int(value)
+                continue
+        # Leerzeilen am Rand und doppelte Leerzeilen (Altlast früherer Status-Updates) entfallen
+        if line.strip() or (extra and extra[-1].strip()):
+            extra.append(line.rstrip())
+    while extra and not extra[-1].strip():
+        extra.pop()
+    if "status" in values:
+        values["status"], values["date"] = _NOTE_STATUS.fullmatch(values["status"]).groups()
+    doc_id = values.get("doc_id")
+    if not (doc_id and doc_id.isdigit()):
+        legacy = _LEGACY_DOC_ID.search(notes or "")
+        values["doc_id"] = legacy.group(1) if legacy else None
+    return TaskNote(version=version, extra=extra, **values)
+
+def get_doc_id_from_notes(notes):
+    return parse_task_note(notes or "").doc_id
+
+# ==== TASK-INDEX (doc_id -> Google Task) ====
+
+def index_lookup(doc_id):
+    return get_state_db().execute(
+        "SELECT * FROM task_index WHERE doc_id = ?", (str(doc_id),)
+    ).fetchone()
+
+def index_store_task(doc_id, tasklist_id, task):
+    notes = task.get('notes') or ""
+    conn = get_state_db()
+    with conn:
+        conn.execute(
+            "INSERT OR REPLACE INTO task_index "
+            "(doc_id, tasklist_id, task_id, etag, status, completed, indexed_at) "
+            "VALUES (?, ?, ?, ?, ?, ?, ?)",
+            (str(doc_id), tasklist_id, task['id'], task.get('etag'),
+             get_status_from_notes(notes), task.get('completed'), time.time()),
+        )
+
+def index_forget(doc_id):
+    conn = get_state_db()
+    with conn:
+        conn.execute("DELETE FROM task_index WHERE doc_id = ?", (str(doc_id),))
+
+def index_is_authoritative():
+    # Nach einem vollständigen Abgleich gilt ein Fehltreffer im Index als "kein Task vorhanden"
+    reconciled_at = float(get_state_value("task_index_reconciled_at", 0) or 0)
+    max_age = get_config("TASK_INDEX_RECONCILE_MINUTES", 60) * 60
+    return time.time() - reconciled_at < max_age
+
+def _fetch_indexed_task(service, entry):
+    try:
+        task = execute_google(service.tasks().get(
+            tasklist=entry['tasklist_id'], task=entry['task_id'], fields=TASK_FIELDS
+        ))
+    except HttpError as e:
+        if e.resp.status in (400, 404):
+            return None
+        raise
+    if task.get('deleted'):
+        return None
+    return task
+
+def _scan_for_task(service, doc_id):
+    # Fallback bei Index-Fehltreffer; alle unterwegs gefundenen Tasks landen mit im Index
+    doc_id = str(doc_id)
+    for tl in iter_task_lists(service):
+        for task in iter_tasks(service, tl['id']):
+            task_doc_id = get_doc_id_from_notes(task.get('notes'))
+            if not task_doc_id:
+                continue
+            index_store_task(task_doc_id, tl['id'], task)
+            if task_doc_id == doc_id:
+                return task, tl['id']
+    return None, None
+
+@google_priority("background")
+def reconcile_task_index(service=None):
+    """Baut den Index aus allen Task-Listen neu auf und entfernt verwaiste Einträge.
+
+    Dabei werden auch die Abgleich-Vermerke (reconciled_tasks) gelöschter Tasks entfernt.
+    """
+    if service is None:
+        service = get_tasks_service()
+    started = time.time()
+    count = 0
+    seen = set()
+    for tl in iter_task_lists(service):
+        for task in iter_tasks(service, tl['id']):
+            if task.get('deleted'):
+                continue
+            seen.add(task['id'])
+            doc_id = get_doc_id_from_notes(task.get('notes'))
+            if doc_id:
+                index_store_task(doc_id, tl['id'], task)
+                count += 1
+    conn = get_state_db()
+    # Nur vor dem Lauf vermerkte Tasks prüfen; währenddessen abgeglichene fehlen evtl. in seen
+    stale = [
+        (row["task_id"],) for row in conn.execute(
+            "SELECT task_id FROM reconciled_tasks WHERE reconciled_at < ?", (started,)
+        ) if row["task_id"] not in seen
+    ]
+    with conn:
+        conn.execute("DELETE FROM task_index WHERE indexed_at < ?", (started,))
+        conn.executemany("DELETE FROM reconciled_tasks WHERE task_id = ?", stale)
+    if stale:
+        logger.info(f"{len(stale)} Abgleich-Vermerk(e) gelöschter Tasks entfernt.")
+    set_state_value("task_index_reconciled_at", str(started))
+    logger.info(f"Task-Index abgeglichen: {count} Aufgabe(n) mit Dokument-ID.")
+    return count
+
+def task_index_reconcile_job():
+    """Geplanter Index-Abgleich des aktuellen Mandanten (siehe JobScheduler)."""
+    interval_minutes = get_config("TASK_INDEX_RECONCILE_MINUTES", 60)
+    try:
+        # Nur ein Prozess gleicht ab; die Lease läuft ab, wenn er ausfällt
+        if acquire_lease("task_index_reconcile", interval_minutes * 60 * 2):
+            reconcile_task_index()
+    except TokenError as e:
+        logger.warning("Google-Token ungültig: %s", e)
+
 # ==== GOOGLE TASKS ====
 def create_task(title, notes, list_id=None):
     if not list_id:
         list_id = get_config("ACTION_TASK_LIST_ID")
     service = get_tasks_service()
     body = {'title': title, 'notes': notes}
-    task = service.tasks().insert(tasklist=list_id, body=body).execute()
-    print('Aufgabe angelegt:', task.get('title'))
+    task = execute_google(service.tasks().insert(tasklist=list_id, body=body, fields=TASK_FIELDS))
+    doc_id = get_doc_id_from_notes(notes)
+    if doc_id:
+        index_store_task(doc_id, list_id, task)
+    logger.info("Aufgabe angelegt: %s", task.get('title'), extra={"doc_id": doc_id})
+    record_activity()
+    return task
 
 def is_task_already_present(service, doc_id, list_id=None):
-    if list_id:
-        tasks = service.tasks().list(tasklist=list_id, showCompleted=True, showHidden=True).execute().get('items', [])
-        marker = f"Dokument-ID: {doc_id}"
-        for task in tasks:
-            if marker in (task.get('notes') or ""):
-                return True
-        return False
-    else:
-        task, _ = find_task_across_lists(service, doc_id)
-        return task is not None
+    return get_task_for_document(service, doc_id, list_id) is not None
 
 def find_task_across_lists(service, doc_id):
-    marker = f"Dokument-ID: {doc_id}"
-    lists = service.tasklists().list().execute().get('items', [])
-    for tl in lists:
-        tasks = service.tasks().list(tasklist=tl['id'], showCompleted=True, showHidden=True).execute().get('items', [])
-        for task in tasks:
-            if marker in (task.get('notes') or ""):
-                return task, tl['id']
-    return None, None
+    entry = index_lookup(doc_id)
+    if entry:
+        task = _fetch_indexed_task(service, entry)
+        if task and get_doc_id_from_notes(task.get('notes')) == str(doc_id):
+            index_store_task(doc_id, entry['tasklist_id'], task)
+            return task, entry['tasklist_id']
+        index_forget(doc_id)
+    elif index_is_authoritative():
+        return None, None
+    return _scan_for_task(service, doc_id)
+
+def build_status_note(notes, new_status, heute):
+    """Setzt die Status-Zeile; mehrfach angewandt bleibt die Notiz gleich lang."""
+    return parse_task_note(notes or "").replace(status=new_status, date=heute).render()
 
-def update_task_note_with_status(doc_id, new_status):
+def update_task_note_with_status(doc_id, new_status, task=None, list_id=None, heute=None):
     service = get_tasks_service()
-    heute = datetime.date.today().isoformat()
+    if heute is None:
+        heute = datetime.date.today().isoformat()
 
-    task, list_id = find_task_across_lists(service, doc_id)
+    if task is None:
+        task, list_id = find_task_across_lists(service, doc_id)
     if not task:
         return
 
-    notes = task.get('notes') or ""
-    # Status-Zeile ersetzen oder hinzufügen
-    if "Status:" in notes:
-        notes = re.sub(r"Status: .*", f"Status: {new_status} (am {heute})\n", notes)
+    notes = build_status_note(task.get('notes'), new_status, heute)
+    task = execute_google(service.tasks().patch(
+        tasklist=list_id, task=task['id'], body={"notes": notes}, fields=TASK_FIELDS
+    ))
+    index_store_task(doc_id, list_id, task)
+    logger.info(f"Status in Task-Notiz für Doc {doc_id} aktualisiert.", extra={"doc_id": doc_id})
+    return task
+
+def _is_rate_limit_error(exc):
+    if not isinstance(exc, HttpError):
+        return False
+    status = exc.resp.status
+    # rateLimitExceeded und userRateLimitExceeded
+    return status == 429 or (status == 403 and b"ateLimitExceeded" in (exc.content or b""))
+
+def _is_daily_limit_error(exc):
+    return isinstance(exc, HttpError) and exc.resp.status == 403 and (
+        b"dailyLimitExceeded" in (exc.content or b"") or b"quotaExceeded" in (exc.content or b"")
+    )
+
+def _is_retryable_http_error(exc, idempotent=True):
+    if not isinstance(exc, HttpError):
+        return False
+    if _is_rate_limit_error(exc):
+        return True
+    status = exc.resp.status
+    # Bei 5xx ist offen, ob der Aufruf ausgeführt wurde; nur wiederholbare Aufrufe erneut schicken
+    return idempotent and status in (500, 502, 503, 504)
+
+def _send_task_batch(chunk, may_retry, priority):
+    # Läuft ggf. in einem Pool-Thread, daher mit eigenem Service und ausdrücklicher Priorität
+    service = get_tasks_service()
+    governor = get_google_quota()
+    results = {}
+    failed = []
+    throttled = []
+    chunk = {str(i): item for i, item in enumerate(chunk)}
+    def callback(request_id, response, exception):
+        item = chunk[request_id]
+        status = "ok" if exception is None else getattr(getattr(exception, "resp", None), "status", "error")
+        metrics.inc("paperless_tasks_google_requests_total", method=f"tasks.tasks.{item[1]}", status=status)
+        count_call("google")
+        if exception is None:
+            results[item[0]] = response
+            return
+        if _is_rate_limit_error(exception):
+            throttled.append(_retry_after(exception))
+        if may_retry and _is_retryable_http_error(exception, idempotent=item[1] != "insert"):
+            failed.append(item)
+        else:
+            results[item[0]] = exception
+    batch = service.new_batch_http_request(callback=callback)
+    for request_id, (_, method, kwargs) in chunk.items():
+        batch.add(getattr(service.tasks(), method)(fields=TASK_FIELDS, **kwargs), request_id=request_id)
+    try:
+        governor.acquire(len(chunk), priority)
+    except GoogleQuotaExceeded as e:
+        return {item[0]: e for item in chunk.values()}, []
+    try:
+        with metrics.timer("paperless_tasks_google_request_seconds", method="batch"):
+            batch.execute()
+    except Exception as e:
+        for item in chunk.values():
+            if may_retry and item[1] != "insert":
+                failed.append(item)
+            else:
+                results[item[0]] = e
+        return results, failed
+    if throttled:
+        governor.throttled(max((t for t in throttled if t), default=None))
     else:
-        notes = f"Status: {new_status} (am {heute})\n" + notes
-    service.tasks().patch(tasklist=list_id, task=task['id'], body={"notes": notes}).execute()
-    print(f"Status in Task-Notiz für Doc {doc_id} aktualisiert.")
+        governor.succeeded(len(chunk))
+    return results, failed
+
+# Langlebige Threads behalten ihren Tasks-Service und ihre SQLite-Verbindung
+_google_batch_pool = ThreadPoolExecutor(max_workers=8, thread_name_prefix="google-batch")
+
+def batch_execute_tasks(calls, retries=3, concurrency=1):
+    """Schickt Tasks-API-Aufrufe gebündelt als HTTP-Batch.
+
+    calls: Liste von (schlüssel, methode, kwargs), z.B. ("abc", "patch", {...}).
+    Rückgabe {schlüssel: Task oder Exception}. Einträge, die mit 429/5xx/
+    rateLimitExceeded scheitern, werden mit Backoff erneut geschickt (inserts
+    nur, wenn Google sie sicher abgelehnt hat). Bis zu `concurrency` Batches
+    laufen parallel (höchstens 8); ein einzelner Batch läuft im aufrufenden Thread.
+    """
+    results = {}
+    pending = list(calls)
+    batch_size = get_config("GOOGLE_BATCH_SIZE", 50)
+    priority = current_google_priority()
+    for attempt in range(retries + 1):
+        chunks = [pending[i:i + batch_size] for i in range(0, len(pending), batch_size)]
+        may_retry = attempt < retries
+        send = bind_tenant(lambda chunk: _send_task_batch(chunk, may_retry, priority))
+        if len(chunks) <= 1 or concurrency <= 1:
+            outcomes = [send(chunk) for chunk in chunks]
+        else:
+            outcomes = []
+            for i in range(0, len(chunks), concurrency):
+                outcomes.extend(_google_batch_pool.map(send, chunks[i:i + concurrency]))
+        failed = []
+        for chunk_results, chunk_failed in outcomes:
+            results.update(chunk_results)
+            failed.extend(chunk_failed)
+        if not failed:
+            break
+        time.sleep(google_backoff(attempt))
+        pending = failed
+    return results
+
+def batch_patch_tasks(patches, retries=3, concurrency=1):
+    """patches: Liste von (tasklist_id, task_id, body); Rückgabe {task_id: Task oder Exception}."""
+    calls = [
+        (task_id, "patch", {"tasklist": list_id, "task": task_id, "body": body})
+        for list_id, task_id, body in patches
+    ]
+    return batch_execute_tasks(calls, retries=retries, concurrency=concurrency)
 
 def get_status_from_notes(notes):
-    match = re.search(r"Status:\s*([\wäöüÄÖÜß]+)", notes)
-    if match:
-        return match.group(1).capitalize()
-    return None
+    status = parse_task_note(notes or "").status
+    if not status:
+        return None
+    # Schreibweise wie in STATUS_LABEL_TO_ID, damit Vergleiche mit Paperless passen
+    for label in get_config_snapshot().status_label_to_id:
+        if label.casefold() == status.casefold():
+            return label
+    return status
+
+# ==== INKREMENTELLER ABGLEICH ====
+def get_sync_watermark(tasklist_id):
+    row = get_state_db().execute(
+        "SELECT updated_min FROM sync_watermark WHERE tasklist_id = ?", (tasklist_id,)
+    ).fetchone()
+    return row["updated_min"] if row else None
+
+def set_sync_watermark(tasklist_id, updated_min):
+    conn = get_state_db()
+    with conn:
+        conn.execute(
+            "INSERT INTO sync_watermark (tasklist_id, updated_min) VALUES (?, ?) "
+            "ON CONFLICT(tasklist_id) DO UPDATE SET updated_min = excluded.updated_min",
+            (tasklist_id, updated_min),
+        )
+
+def is_task_reconciled(task):
+    row = get_state_db().execute(
+        "SELECT etag FROM reconciled_tasks WHERE task_id = ?", (task['id'],)
+    ).fetchone()
+    return row is not None and row["etag"] == task.get('etag')
+
+def mark_task_reconciled(task):
+    conn = get_state_db()
+    with conn:
+        conn.execute(
+            "INSERT OR REPLACE INTO reconciled_tasks (task_id, etag, reconciled_at) VALUES (?, ?, ?)",
+            (task['id'], task.get('etag') or "", time.time()),
+        )
+
+def _percentile(values, q):
+    if not values:
+        return None
+    values = sorted(values)
+    return values[min(len(values) - 1, int(round(q * (len(values) - 1))))]
 
-def update_bearbeitet_am_for_completed_tasks():
+def _reconcile_document(doc_id, done_label, heute):
+    """Rückgabe ("ok" | "permanent" | "retry", sekunden); permanent z.B. bei gelöschtem Dokument."""
+    started = time.perf_counter()
+    try:
+        set_bearbeitungsstatus_und_datum(doc_id, done_label, heute, raise_errors=True)
+        result = "ok"
+    except Exception as e:
+        result = "permanent" if journal_error_kind(e) == "permanent" else "retry"
+        logger.error(f"Fehler beim Abgleich von Dokument {doc_id}: {e}", extra={"doc_id": doc_id})
+    return result, time.perf_counter() - started
+
+@google_priority("background")
+def update_bearbeitet_am_for_completed_tasks(full=False):
+    """Überträgt erledigte Google Tasks nach Paperless.
+
+    Standardmäßig werden je Liste nur Tasks abgefragt, die sich seit dem letzten
+    Lauf geändert haben (updatedMin); bereits abgeglichene Stände (Task-ID + ETag)
+    werden übersprungen. Mit full=True werden alle Tasks gelesen.
+
+    Die Paperless-Updates laufen parallel (RECONCILE_PAPERLESS_CONCURRENCY), die
+    Notiz-Patches gehen gebündelt an Google (RECONCILE_GOOGLE_CONCURRENCY Batches
+    gleichzeitig, begrenzt durch den Google-Token-Bucket). Eine Zusammenfassung
+    des Laufs wird ausgegeben und für /stats gespeichert.
+    """
+    # Nur die Aufrufe dieses Laufs zählen, nicht Webhooks oder andere Mandanten
+    with count_calls() as calls:
+        return _update_bearbeitet_am_for_completed_tasks(full, calls)
+
+def _update_bearbeitet_am_for_completed_tasks(full, calls):
     try:
         service = get_tasks_service()
     except TokenError as e:
-        print("Google-Token ungültig:", e)
+        logger.warning("Google-Token ungültig: %s", e)
         return
+    run_started = time.perf_counter()
+    started_at = datetime.datetime.now().isoformat(timespec="seconds")
     heute = datetime.date.today().isoformat()
+    done_label = get_config("STATUS_LABEL_DONE", "Erledigt")
+    incremental = not full and get_config("INCREMENTAL_SYNC", True)
+    watermarks = {}
+    failed_lists = set()
+    tasks_seen = 0
+    futures = {}
+    # Pool-Threads kennen den Mandanten nicht von selbst
+    reconcile_document = bind_tenant(_reconcile_document)
+    with ThreadPoolExecutor(max_workers=get_config("RECONCILE_PAPERLESS_CONCURRENCY", 4)) as pool:
+        for tl in iter_task_lists(service):
+            watermark = get_sync_watermark(tl['id']) if incremental else None
+            params = {'showDeleted': True}
+            if watermark:
+                params['updatedMin'] = watermark
+            newest = watermark
+            for task in iter_tasks(service, tl['id'], **params):
+                tasks_seen += 1
+                updated = task.get('updated')
+                if updated and (newest is None or updated > newest):
+                    newest = updated
+                notes = task.get('notes', '')
+                doc_id = get_doc_id_from_notes(notes)
+                if not doc_id:
+                    continue
+                if task.get('deleted'):
+                    entry = index_lookup(doc_id)
+                    if entry and entry['task_id'] == task['id']:
+                        index_forget(doc_id)
+                    continue
+                index_store_task(doc_id, tl['id'], task)
+                if not task.get('completed'):
+                    continue
+                if is_task_reconciled(task):
+                    continue
+                # Paperless-Arbeit startet sofort, während die Listen weiter gelesen werden
+                future = pool.submit(reconcile_document, doc_id, done_label, heute)
+                futures[future] = (tl['id'], task, doc_id, notes)
+            if newest and newest != watermark:
+                watermarks[tl['id']] = newest
+
+    paperless_latencies = []
+    patches = {}
+    skipped = 0
+    for future, (list_id, task, doc_id, notes) in futures.items():
+        try:
+            result, seconds = future.result()
+            paperless_latencies.append(seconds)
+        except Exception as e:
+            logger.error(f"Fehler beim Abgleich von Dokument {doc_id}: {e}", extra={"doc_id": doc_id})
+            result = "retry"
+        if result == "permanent":
+            # Wiederholen hilft nicht (z.B. Dokument gelöscht); erst eine Änderung am Task löst einen neuen Versuch aus
+            mark_task_reconciled(task)
+            skipped += 1
+            continue
+        if result != "ok":
+            # Beim nächsten Lauf erneut versuchen
+            failed_lists.add(list_id)
+            continue
+        patches[task['id']] = (list_id, task, doc_id, build_status_note(notes, done_label, heute))
+
+    google_started = time.perf_counter()
+    results = batch_patch_tasks(
+        [(list_id, task_id, {"notes": notes}) for task_id, (list_id, _, _, notes) in patches.items()],
+        concurrency=get_config("RECONCILE_GOOGLE_CONCURRENCY", 2),
+    )
+    google_seconds = time.perf_counter() - google_started
     erledigt = 0
-    done_label = get_config("STATUS_LABEL_DONE", "Erledigt")
-    lists = service.tasklists().list().execute().get('items', [])
-    for tl in lists:
-        tasks = service.tasks().list(
-            tasklist=tl['id'],
-            showCompleted=True,
-            showHidden=True
-        ).execute().get('items', [])
-        for task in tasks:
-            if not task.get('completed'):
-                continue
-            notes = task.get('notes', '')
-            match = re.search(r'Dokument-ID: (\d+)', notes)
-            if not match:
-                continue
-            doc_id = match.group(1)
-            status = get_status_from_notes(notes) or done_label
-            doc = get_document_meta_by_id(doc_id)
-            set_bearbeitet_am(doc_id, heute)
-            set_bearbeitungsstatus(doc_id, done_label)
-            update_task_note_with_status(doc_id, done_label)
+    for task_id, (list_id, task, doc_id, _) in patches.items():
+        result = results.get(task_id)
+        if isinstance(result, dict):
+            # Der eigene Patch ändert das ETag; gemerkt wird der neue Stand
+            index_store_task(doc_id, list_id, result)
+            mark_task_reconciled(result)
             erledigt += 1
-    if erledigt:
-        print(f"{erledigt} Dokument(e) als erledigt markiert.")
+        elif journal_error_kind(result) == "permanent":
+            logger.error(f"Task-Notiz für Doc {doc_id} nicht aktualisierbar, wird übersprungen: {result}", extra={"doc_id": doc_id})
+            mark_task_reconciled(task)
+            skipped += 1
+        else:
+            logger.error(f"Task-Notiz für Doc {doc_id} konnte nicht aktualisiert werden: {result}", extra={"doc_id": doc_id})
+            failed_lists.add(list_id)
+
+    # Wasserzeichen nur für Listen ohne Fehler fortschreiben, sonst fehlen die Tasks im nächsten Lauf
+    for list_id, newest in watermarks.items():
+        if list_id not in failed_lists:
+            set_sync_watermark(list_id, newest)
+
+    duration = time.perf_counter() - run_started
+    summary = {
+        "started_at": started_at,
+        "full": not incremental,
+        "duration_seconds": round(duration, 3),
+        "tasks_seen": tasks_seen,
+        "documents_processed": len(futures),
+        "documents_done": erledigt,
+        "documents_skipped": skipped,
+        "documents_failed": len(futures) - erledigt - skipped,
+        "documents_per_second": round(len(futures) / duration, 2) if duration else None,
+        "paperless_latency_p50": _percentile(paperless_latencies, 0.5),
+        "paperless_latency_p95": _percentile(paperless_latencies, 0.95),
+        "google_patch_seconds": round(google_seconds, 3),
+        "google_calls": calls["google"],
+        "paperless_calls": calls["paperless"],
+    }
+    metrics.observe(
+        "paperless_tasks_poll_run_seconds", duration,
+        mode="full" if full or not incremental else "incremental", tenant=current_tenant().name,
+    )
+    metrics.inc("paperless_tasks_poll_documents_total", erledigt, result="done")
+    metrics.inc("paperless_tasks_poll_documents_total", skipped, result="skipped")
+    metrics.inc("paperless_tasks_poll_documents_total", len(futures) - erledigt - skipped, result="failed")
+    set_state_value("last_completed_tasks_run", json.dumps(summary))
+    if futures:
+        logger.info(
+            f"{erledigt} Dokument(e) als erledigt markiert ({summary['documents_failed']} fehlgeschlagen, "
+            f"{summary['duration_seconds']}s, {summary['documents_per_second']} Dok./s).",
+            extra={"run": summary},
+        )
+    return summary
 
 app = Flask(__name__)
 
 
 @app.errorhandler(TokenError)
 def handle_token_error(error):
-    """Bei ungültigem Token zur OAuth-Anmeldung weiterleiten."""
-    return redirect(url_for("authorize"))
+    """Bei ungültigem Token zur OAuth-Anmeldung (des jeweiligen Mandanten) weiterleiten."""
+    return redirect(current_tenant().url_prefix + url_for("authorize"))
 
 
 @app.route("/authorize")
 def authorize():
-    token_path = get_config("GOOGLE_TASKS_TOKEN", "token.json")
+    token_path = get_config("GOOGLE_TASKS_TOKEN", current_tenant().default_path("token.json"))
     client_id = get_config("GOOGLE_CLIENT_ID")
     client_secret = get_config("GOOGLE_CLIENT_SECRET")
     if not client_id or not client_secret:
@@ -343,14 +2027,195 @@ def authorize():
         scopes=get_config("SCOPES"),
     )
     creds = flow.run_local_server(port=0)
-    with open(token_path, "w") as token_file:
-        token_file.write(creds.to_json())
+    atomic_write_text(token_path, creds.to_json())
+    get_tasks_client().invalidate()
     return "Token gespeichert. Sie können dieses Fenster schließen."
 
-@app.route("/paperless_webhook", methods=["POST"])
-def paperless_webhook():
-    data = request.get_json(force=True)
-    print("\nWebhook erhalten:", data)
+# ==== WEBHOOK-WARTESCHLANGE ====
+# Ereignisse werden in der SQLite-Zustandsdatei gepuffert und von Worker-Threads
+# abgearbeitet. Ein Eintrag wird erst nach erfolgreicher Verarbeitung gelöscht;
+# stürzt der Prozess ab, wird er nach Ablauf der Sperre (Lease) erneut geholt.
+#
+# Paperless schickt pro Dokument oft mehrere Ereignisse kurz hintereinander
+# ("added", "updated", ...). Solange ein Eintrag noch wartet, wird ein neues
+# Ereignis in ihn eingefaltet und das Zeitfenster verlängert (höchstens bis
+# WEBHOOK_DEBOUNCE_MAX_SECONDS nach dem ersten Ereignis). Verarbeitet wird
+# immer der aktuelle Dokumentstand.
+WEBHOOK_LEASE_SECONDS = 300
+_webhook_wakeup = threading.Event()
+
+def enqueue_webhook_event(doc_id, payload):
+    now = time.time()
+    window = get_config("WEBHOOK_DEBOUNCE_SECONDS", 3)
+    max_wait = get_config("WEBHOOK_DEBOUNCE_MAX_SECONDS", 30)
+    conn = get_state_db()
+    conn.execute("BEGIN IMMEDIATE")
+    try:
+        row = conn.execute(
+            "SELECT id, created_at FROM webhook_queue WHERE doc_id = ? "
+            "AND (locked_until IS NULL OR locked_until < ?) ORDER BY id LIMIT 1",
+            (str(doc_id), now),
+        ).fetchone()
+        if row:
+            conn.execute(
+                "UPDATE webhook_queue SET payload = ?, next_attempt_at = ? WHERE id = ?",
+                (json.dumps(payload), min(now + window, row["created_at"] + max_wait), row["id"]),
+            )
+        else:
+            conn.execute(
+                "INSERT INTO webhook_queue (doc_id, payload, next_attempt_at, created_at) VALUES (?, ?, ?, ?)",
+                (str(doc_id), json.dumps(payload), now + window, now),
+            )
+        conn.commit()
+    except BaseException:
+        conn.rollback()
+        raise
+    _webhook_wakeup.set()
+
+def _claim_webhook_event():
+    conn = get_state_db()
+    now = time.time()
+    conn.execute("BEGIN IMMEDIATE")
+    try:
+        # Dokumente, die gerade ein anderer Worker bearbeitet, werden übersprungen
+        row = conn.execute(
+            "SELECT * FROM webhook_queue q WHERE q.next_attempt_at <= ? "
+            "AND (q.locked_until IS NULL OR q.locked_until < ?) "
+            "AND NOT EXISTS (SELECT 1 FROM webhook_queue p WHERE p.doc_id = q.doc_id "
+            "AND p.id != q.id AND p.locked_until >= ?) "
+            "ORDER BY q.id LIMIT 1",
+            (now, now, now),
+        ).fetchone()
+        if row:
+            conn.execute(
+                "UPDATE webhook_queue SET locked_until = ? WHERE id = ?",
+                (now + WEBHOOK_LEASE_SECONDS, row["id"]),
+            )
+        conn.commit()
+    except BaseException:
+        conn.rollback()
+        raise
+    return row
+
+def _complete_webhook_event(row):
+    conn = get_state_db()
+    with conn:
+        conn.execute("DELETE FROM webhook_queue WHERE id = ?", (row["id"],))
+
+def _fail_webhook_event(row, error):
+    attempts = row["attempts"] + 1
+    conn = get_state_db()
+    with conn:
+        # Standard: etwa ein Tag, damit Ausfälle von Paperless oder Google überbrückt werden
+        if attempts >= get_config("WEBHOOK_MAX_ATTEMPTS", 50):
+            conn.execute(
+                "INSERT INTO webhook_dead_letter "
+                "(id, doc_id, payload, attempts, last_error, created_at, failed_at) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (row["id"], row["doc_id"], row["payload"], attempts, str(error),
+                 row["created_at"], time.time()),
+            )
+            conn.execute("DELETE FROM webhook_queue WHERE id = ?", (row["id"],))
+            logger.error(f"Webhook für Dokument {row['doc_id']} nach {attempts} Versuchen aufgegeben: {error}", extra={"doc_id": row["doc_id"]})
+            return
+        delay = min(5 * 2 ** (attempts - 1), get_config("WEBHOOK_RETRY_MAX_SECONDS", 1800))
+        conn.execute(
+            "UPDATE webhook_queue SET attempts = ?, next_attempt_at = ?, locked_until = NULL, "
+            "last_error = ? WHERE id = ?",
+            (attempts, time.time() + delay, str(error), row["id"]),
+        )
+    logger.warning(
+        f"Webhook für Dokument {row['doc_id']} fehlgeschlagen (Versuch {attempts}), neuer Versuch in {delay}s: {error}",
+        extra={"doc_id": row["doc_id"]},
+    )
+
+def process_next_webhook_event():
+    """Verarbeitet höchstens ein fälliges Ereignis; False, wenn nichts zu tun war."""
+    row = _claim_webhook_event()
+    if row is None:
+        return False
+    payload = json.loads(row["payload"])
+    # Der Web-Prozess hat nur seine eigenen Caches verworfen; ein separater Worker hat eigene
+    invalidate_document(row["doc_id"])
+    try:
+        result = process_document_event(row["doc_id"], payload.get("base_url"))
+    except Exception as e:
+        _fail_webhook_event(row, e)
+    else:
+        _complete_webhook_event(row)
+        logger.info(f"Webhook für Dokument {row['doc_id']} verarbeitet: {result}", extra={"doc_id": row["doc_id"]})
+    return True
+
+def redrive_webhook_dead_letters(doc_id=None):
+    """Stellt aufgegebene Ereignisse (alle oder die eines Dokuments) erneut in die Warteschlange."""
+    now = time.time()
+    where, params = ("WHERE doc_id = ?", (str(doc_id),)) if doc_id else ("", ())
+    conn = get_state_db()
+    conn.execute("BEGIN IMMEDIATE")
+    try:
+        count = conn.execute(
+            "INSERT INTO webhook_queue (doc_id, payload, next_attempt_at, created_at) "
+            f"SELECT doc_id, payload, ?, ? FROM webhook_dead_letter {where} ORDER BY id",
+            (now, now, *params),
+        ).rowcount
+        conn.execute(f"DELETE FROM webhook_dead_letter {where}", params)
+        conn.commit()
+    except BaseException:
+        conn.rollback()
+        raise
+    if count:
+        logger.info(f"{count} aufgegebene(s) Webhook-Ereignis(se) erneut eingereiht.")
+        _webhook_wakeup.set()
+    return count
+
+def webhook_queue_stats():
+    conn = get_state_db()
+    pending = conn.execute("SELECT COUNT(*) FROM webhook_queue").fetchone()[0]
+    dead = conn.execute("SELECT COUNT(*) FROM webhook_dead_letter").fetchone()[0]
+    return {"pending": pending, "dead_letter": dead}
+
+_shutdown = threading.Event()
+
+def start_webhook_workers(count=None):
+    if count is None:
+        count = get_config("WEBHOOK_WORKERS", 2)
+    def job():
+        while not _shutdown.is_set():
+            # Je Runde höchstens ein Ereignis pro Mandant, damit keiner die anderen ausbremst
+            worked = False
+            for tenant in get_tenants():
+                try:
+                    with tenant_context(tenant):
+                        worked = process_next_webhook_event() or worked
+                except Exception as e:
+                    logger.exception("Fehler im Webhook-Worker: %s", e)
+            if worked:
+                continue
+            _webhook_wakeup.wait(timeout=1)
+            _webhook_wakeup.clear()
+    threads = []
+    for i in range(count):
+        thread = threading.Thread(target=job, daemon=True, name=f"webhook-worker-{i}")
+        thread.start()
+        threads.append(thread)
+    return threads
+
+_document_locks = weakref.WeakValueDictionary()
+_document_locks_guard = threading.Lock()
+
+def document_lock(doc_id):
+    """Sperre je Dokument, damit die Entscheidung "Task anlegen oder aktualisieren" serialisiert ist."""
+    key = (current_tenant().name, str(doc_id))
+    with _document_locks_guard:
+        lock = _document_locks.get(key)
+        if lock is None:
+            lock = threading.Lock()
+            _document_locks[key] = lock
+        return lock
+
+def extract_doc_id(data):
+    if not isinstance(data, dict):
+        return None
     doc_id = data.get("id")
     if not doc_id:
         doc_url = data.get("doc_url")
@@ -358,14 +2223,89 @@ def paperless_webhook():
             match = re.search(r'/documents/(\d+)/', doc_url)
             if match:
                 doc_id = match.group(1)
+    if doc_id and not str(doc_id).isdigit():
+        return None
+    return doc_id
+
+@app.route("/paperless_webhook", methods=["POST"])
+def paperless_webhook():
+    started = time.perf_counter()
+    body, status = _handle_webhook()
+    metrics.observe("paperless_tasks_webhook_request_seconds", time.perf_counter() - started)
+    metrics.inc("paperless_tasks_webhook_requests_total", status=status, tenant=current_tenant().name)
+    return body, status
+
+def _handle_webhook():
+    data = request.get_json(force=True, silent=True)
+    logger.info("Webhook erhalten", extra={"payload": data})
+    doc_id = extract_doc_id(data)
     if not doc_id:
-        print("Keine Dokumenten-ID im Payload!")
+        logger.warning("Keine Dokumenten-ID im Payload!")
         return "Fehler", 400
-    doc = get_document_meta_by_id(doc_id)
+    invalidate_document(doc_id)
+    base_url = request.url_root.rstrip("/")
+    if not get_config("WEBHOOK_ASYNC", True):
+        record_activity()
+        try:
+            return process_document_event(doc_id, base_url), 200
+        except Exception as e:
+            logger.error(f"Fehler bei Dokument {doc_id}: {e}", extra={"doc_id": doc_id})
+            return "Fehler", 500
+    enqueue_webhook_event(doc_id, {"base_url": base_url})
+    record_activity()
+    return "Angenommen", 202
+
+def build_task_notes(doc_id, doc, base_url=None):
+    paperless_url = get_config("PAPERLESS_URL")
+    link_webui = f"{paperless_url}/documents/{doc_id}/"
+    server_url = get_config("SERVER_BASE_URL", base_url)
+    if not server_url:
+        # Ohne Server-URL wären die Links in der Notiz unbrauchbar
+        raise ValueError("SERVER_BASE_URL ist nicht gesetzt")
+    base_url = f"{server_url}{current_tenant().url_prefix}"
+    link_view_pdf = f"{base_url}/view_pdf/{doc_id}"
+    status_link = f"{base_url}/status/{doc_id}?popup=1"
+    lookups = get_paperless_lookups()
+    return TaskNote(
+        status=get_config("STATUS_LABEL_NEW", "Unbearbeitet"),
+        status_link=status_link,
+        doc_type=lookups.name("document_types", doc.get("document_type")),
+        correspondent=lookups.name("correspondents", doc.get("correspondent")),
+        added=doc.get("added"),
+        web_link=link_webui,
+        pdf_link=link_view_pdf,
+        doc_id=doc_id,
+    ).render()
+
+def needs_task(doc):
+    """Dokument soll laut KI bearbeitet werden und ist noch nicht erledigt."""
+    if get_aktion_wert(doc) <= get_config("ACTION_THRESHOLD"):
+        return False
+    return get_bearbeitungsstatus(doc) != get_config("STATUS_LABEL_DONE", "Erledigt")
+
+def process_document_event(doc_id, base_url=None):
+    """Gleicht ein Paperless-Dokument mit Google Tasks ab; löst bei Fehlern eine Exception aus."""
+    started = time.perf_counter()
+    result = "error"
+    try:
+        with document_lock(doc_id):
+            message = _process_document_event(doc_id, base_url)
+        result = "ok"
+        return message
+    finally:
+        metrics.observe("paperless_tasks_webhook_processing_seconds", time.perf_counter() - started, result=result)
+
+def _process_document_event(doc_id, base_url):
+    # Das Dokument wird ggf. geschrieben (Status für neuen Task), daher frisch laden
+    doc = get_document_meta_by_id(doc_id, fresh=True)
     if not doc:
-        return "Fehler", 500
+        raise RuntimeError(f"Dokument {doc_id} konnte nicht geladen werden")
     aktion_wert = get_aktion_wert(doc)
     status = get_bearbeitungsstatus(doc)
+    entry = index_lookup(doc_id)
+    if entry and entry['status'] == status:
+        logger.info("Status schon synchron.", extra={"doc_id": doc_id})
+        return "Status abgeglichen"
     service = get_tasks_service()
     task, _ = find_task_across_lists(service, doc_id)
     if task:
@@ -373,51 +2313,380 @@ def paperless_webhook():
         status_in_task = get_status_from_notes(notes)
         if status != status_in_task:
             update_task_note_with_status(doc_id, status)
-            print(f"Status in Google Tasks für Doc {doc_id} aktualisiert: {status_in_task} → {status}")
+            logger.info(f"Status in Google Tasks für Doc {doc_id} aktualisiert: {status_in_task} → {status}", extra={"doc_id": doc_id})
         else:
-            print("Status schon synchron.")
-        return "Status abgeglichen", 200
+            logger.info("Status schon synchron.", extra={"doc_id": doc_id})
+        return "Status abgeglichen"
     if aktion_wert <= get_config("ACTION_THRESHOLD"):
-        print(f"Dokument benötigt laut KI keine Bearbeitung ({aktion_wert}%)")
-        return "Keine Aufgabe erzeugt", 200
+        logger.info(f"Dokument benötigt laut KI keine Bearbeitung ({aktion_wert}%)", extra={"doc_id": doc_id})
+        return "Keine Aufgabe erzeugt"
     if status == get_config("STATUS_LABEL_DONE", "Erledigt"):
-        print(f"Dokument {doc_id} ist bereits erledigt – kein Task mehr nötig.")
-        return "Bereits erledigt", 200
-    paperless_url = get_config("PAPERLESS_URL")
-    link_webui = f"{paperless_url}/documents/{doc_id}/"
-    base_url = get_config("SERVER_BASE_URL", request.url_root.rstrip("/"))
-    link_view_pdf = f"{base_url}/view_pdf/{doc_id}"
-    status_link = f"{base_url}/status/{doc_id}?popup=1"
-    title = doc.get("title", "Paperless-Dokument")
-    doc_type = doc.get("document_type")
-    correspondent = doc.get("correspondent")
-    added = doc.get("added")
+        logger.info(f"Dokument {doc_id} ist bereits erledigt – kein Task mehr nötig.", extra={"doc_id": doc_id})
+        return "Bereits erledigt"
     status_new = get_config("STATUS_LABEL_NEW", "Unbearbeitet")
-    notes = (
-        f"Status: {status_new}\n"
-        f"Status bearbeiten: {status_link}\n"
-        f"Typ: {doc_type}\n"
-        f"Person: {correspondent}\n"
-        f"Hinzugefügt am: {added}\n"
-        f"Web-Ansicht: {link_webui}\n"
-        f"PDF-Ansicht: {link_view_pdf}\n"
-        f"Dokument-ID: {doc_id}"
-    )
-    set_bearbeitungsstatus(doc_id, status_new)
-    create_task(title=title, notes=notes, list_id=get_config("ACTION_TASK_LIST_ID"))
-    return "OK", 200
+    notes = build_task_notes(doc_id, doc, base_url)
+    # Derselbe Dokumentstand ergibt denselben Schlüssel; ein erneut zugestelltes Ereignis legt keinen zweiten Task an
+    _, pending, failed = journal_submit(doc_id, f"{doc_id}:neu:{doc.get('modified', '')}", [
+        ("paperless_status", {"status": status_new}),
+        ("task_create", {
+            "title": doc.get("title", "Paperless-Dokument"),
+            "notes": notes,
+            "list_id": get_config("ACTION_TASK_LIST_ID"),
+        }),
+    ], doc=doc)
+    if failed:
+        return "Fehlgeschlagen"
+    return "Vorgemerkt" if pending else "OK"
 
 def get_task_for_document(service, doc_id, list_id=None):
-    if list_id:
-        tasks = service.tasks().list(tasklist=list_id, showCompleted=True, showHidden=True).execute().get('items', [])
-        marker = f"Dokument-ID: {doc_id}"
-        for task in tasks:
-            if marker in (task.get('notes') or ""):
-                return task
+    task, tasklist_id = find_task_across_lists(service, doc_id)
+    if list_id and tasklist_id != list_id:
         return None
+    return task
+
+# ==== OPERATIONS-JOURNAL ====
+# Schreibende Schritte nach Paperless und Google (Status, Task-Notiz, neuer
+# Task) werden vor der Ausführung in der Zustandsdatei vermerkt, je Schritt mit
+# einem Idempotenzschlüssel. Ein Schritt gilt erst nach erfolgreicher
+# Ausführung als erledigt; bleibt er nach einem Absturz oder Fehler offen,
+# liefert operation_journal_job ihn nach (beim Start sofort, danach alle
+# JOURNAL_RETRY_SECONDS). Solange für ein Ziel Schritte fehlschlagen, werden
+# neue gar nicht erst direkt versucht, sondern nur vermerkt und später
+# gebündelt zugestellt. Ein neuerer Schritt derselben Art für dasselbe Dokument
+# ersetzt einen noch offenen älteren.
+JOURNAL_LOCK_SECONDS = 120
+
+def _journal_paperless_fields(doc_id, payload, doc=None, retry=False):
+    return set_bearbeitungsstatus_und_datum(
+        doc_id, payload["status"], payload["datum"], doc=doc, raise_errors=True
+    )
+
+def _journal_paperless_status(doc_id, payload, doc=None, retry=False):
+    return set_bearbeitungsstatus(doc_id, payload["status"], doc=doc, raise_errors=True)
+
+def _journal_task_status(doc_id, payload, doc=None, retry=False):
+    return update_task_note_with_status(doc_id, payload["status"], heute=payload.get("datum"))
+
+def _journal_task_create(doc_id, payload, doc=None, retry=False):
+    service = get_tasks_service()
+    if retry:
+        # Der frühere Versuch kann den Task angelegt haben, ohne dass die Antwort (und
+        # damit der Index-Eintrag) ankam; daher nicht dem Index trauen, sondern suchen
+        task, _ = _scan_for_task(service, doc_id)
     else:
-        task, _ = find_task_across_lists(service, doc_id)
+        task = get_task_for_document(service, doc_id)
+    if task is not None:
         return task
+    return create_task(title=payload["title"], notes=payload["notes"], list_id=payload.get("list_id"))
+
+# Art -> (Ziel, Ausführung)
+JOURNAL_STEPS = {
+    "paperless_fields": ("paperless", _journal_paperless_fields),
+    "paperless_status": ("paperless", _journal_paperless_status),
+    "task_status": ("google", _journal_task_status),
+    "task_create": ("google", _journal_task_create),
+}
+
+def journal_error_kind(error):
+    """"permanent" (4xx, ungültige Daten), "target" (Ziel gestört) oder "retry" (sonstige Fehler)."""
+    if isinstance(error, PaperlessError):
+        status = error.status
+    elif isinstance(error, HttpError):
+        if _is_rate_limit_error(error):
+            return "target"
+        status = error.resp.status
+    elif isinstance(error, (requests.RequestException, httplib2.HttpLib2Error, OSError,
+                            GoogleQuotaExceeded, TokenError)):
+        return "target"
+    elif isinstance(error, ValueError):
+        return "permanent"
+    else:
+        return "retry"
+    if status is None or status == 429 or status >= 500:
+        return "target"
+    return "permanent" if 400 <= status < 500 else "retry"
+
+def journal_target_failing(target):
+    """True, solange das Ziel nach einem Verbindungs-, 5xx- oder 429-Fehler auf den nächsten Versuch wartet."""
+    return time.time() < _state_time(f"journal_{target}_down_until")
+
+def _set_target_down(target, until):
+    if until:
+        set_state_value(f"journal_{target}_down_until", str(until))
+    elif _state_time(f"journal_{target}_down_until"):
+        set_state_value(f"journal_{target}_down_until", "0")
+
+def _lock_journal_row(row_id):
+    now = time.time()
+    conn = get_state_db()
+    with conn:
+        cur = conn.execute(
+            "UPDATE operation_journal SET locked_until = ? WHERE id = ? AND state = 'pending' "
+            "AND (locked_until IS NULL OR locked_until < ?)",
+            (now + JOURNAL_LOCK_SECONDS, row_id, now),
+        )
+    return cur.rowcount == 1
+
+def _claim_journal_rows(limit):
+    conn = get_state_db()
+    now = time.time()
+    conn.execute("BEGIN IMMEDIATE")
+    try:
+        rows = conn.execute(
+            "SELECT * FROM operation_journal WHERE state = 'pending' AND next_attempt_at <= ? "
+            "AND (locked_until IS NULL OR locked_until < ?) ORDER BY id LIMIT ?",
+            (now, now, limit),
+        ).fetchall()
+        conn.executemany(
+            "UPDATE operation_journal SET locked_until = ? WHERE id = ?",
+            [(now + JOURNAL_LOCK_SECONDS, row["id"]) for row in rows],
+        )
+        conn.commit()
+    except BaseException:
+        conn.rollback()
+        raise
+    return rows
+
+def _journal_row_pending(row):
+    current = get_state_db().execute(
+        "SELECT state FROM operation_journal WHERE id = ?", (row["id"],)
+    ).fetchone()
+    return current is not None and current["state"] == "pending"
+
+def _finish_journal_row(row):
+    conn = get_state_db()
+    with conn:
+        conn.execute(
+            "UPDATE operation_journal SET state = 'done', finished_at = ?, locked_until = NULL "
+            "WHERE id = ? AND state = 'pending'",
+            (time.time(), row["id"]),
+        )
+
+def _release_journal_row(row, delay):
+    # Ziel ist gerade gestört: ohne Versuch zurückstellen
+    conn = get_state_db()
+    with conn:
+        conn.execute(
+            "UPDATE operation_journal SET locked_until = NULL, next_attempt_at = ? WHERE id = ?",
+            (time.time() + delay, row["id"]),
+        )
+
+def _fail_journal_row(row, error):
+    """Vermerkt einen Fehler; Rückgabe ist journal_error_kind(error).
+
+    Fehler, die nur dieses Dokument betreffen (4xx), werden sofort aufgegeben.
+    Nur Verbindungsfehler, 5xx und 429 markieren das Ziel bis zum nächsten
+    Versuch als gestört.
+    """
+    attempts = row["attempts"] + 1
+    kind = journal_error_kind(error)
+    metrics.inc("paperless_tasks_journal_failures_total", kind=row["kind"], error=kind)
+    conn = get_state_db()
+    with conn:
+        if kind == "permanent" or attempts >= get_config("JOURNAL_MAX_ATTEMPTS", 50):
+            conn.execute(
+                "UPDATE operation_journal SET state = 'failed', attempts = ?, last_error = ?, "
+                "finished_at = ?, locked_until = NULL WHERE id = ?",
+                (attempts, str(error), time.time(), row["id"]),
+            )
+            logger.error(f"Schritt {row['kind']} für Dokument {row['doc_id']} nach {attempts} Versuch(en) aufgegeben: {error}", extra={"doc_id": row["doc_id"]})
+            return kind
+        delay = min(5 * 2 ** (attempts - 1), 600)
+        conn.execute(
+            "UPDATE operation_journal SET attempts = ?, next_attempt_at = ?, locked_until = NULL, "
+            "last_error = ? WHERE id = ?",
+            (attempts, time.time() + delay, str(error), row["id"]),
+        )
+    if kind == "target":
+        _set_target_down(JOURNAL_STEPS[row["kind"]][0], time.time() + delay)
+    logger.warning(
+        f"Schritt {row['kind']} für Dokument {row['doc_id']} fehlgeschlagen (Versuch {attempts}), neuer Versuch in {delay}s: {error}",
+        extra={"doc_id": row["doc_id"]},
+    )
+    return kind
+
+def _apply_journal_row(row, doc=None):
+    """Führt einen gesperrten Schritt aus; Fehler werden vermerkt.
+
+    Rückgabe (ok, ergebnis); bei einem Fehler ist ergebnis journal_error_kind().
+    """
+    if not _journal_row_pending(row):
+        return True, None
+    try:
+        # Schon einmal versucht oder nach einem Absturz liegen geblieben (Sperre abgelaufen)
+        retry = row["attempts"] > 0 or row["locked_until"] is not None
+        result = JOURNAL_STEPS[row["kind"]][1](row["doc_id"], json.loads(row["payload"]), doc=doc, retry=retry)
+    except Exception as e:
+        return False, _fail_journal_row(row, e)
+    _set_target_down(JOURNAL_STEPS[row["kind"]][0], None)
+    _finish_journal_row(row)
+    metrics.inc("paperless_tasks_journal_steps_total", kind=row["kind"])
+    return True, result
+
+def journal_submit(doc_id, op_key, steps, doc=None):
+    """Vermerkt Schritte [(art, payload), ...] und führt sie nach Möglichkeit sofort aus.
+
+    Der Schlüssel eines Schritts ist "<op_key>:<art>"; ein schon bekannter
+    Schlüssel wird nicht erneut angelegt und ein erledigter Schritt nicht
+    wiederholt. Rückgabe ({art: ergebnis}, anzahl_offen, anzahl_aufgegeben).
+    """
+    doc_id = str(doc_id)
+    now = time.time()
+    conn = get_state_db()
+    conn.execute("BEGIN IMMEDIATE")
+    try:
+        for kind, payload in steps:
+            key = f"{op_key}:{kind}"
+            conn.execute(
+                "UPDATE operation_journal SET state = 'superseded', finished_at = ? "
+                "WHERE doc_id = ? AND kind = ? AND state = 'pending' AND op_key != ?",
+                (now, doc_id, kind, key),
+            )
+            conn.execute(
+                "INSERT OR IGNORE INTO operation_journal "
+                "(op_key, doc_id, kind, payload, next_attempt_at, created_at) VALUES (?, ?, ?, ?, ?, ?)",
+                (key, doc_id, kind, json.dumps(payload), now, now),
+            )
+        rows = [
+            conn.execute("SELECT * FROM operation_journal WHERE op_key = ?", (f"{op_key}:{kind}",)).fetchone()
+            for kind, _ in steps
+        ]
+        conn.commit()
+    except BaseException:
+        conn.rollback()
+        raise
+    results = {}
+    pending = failed = 0
+    failing = {}
+    for row in rows:
+        if row["state"] == "failed":
+            failed += 1
+        if row["state"] != "pending":
+            continue
+        target = JOURNAL_STEPS[row["kind"]][0]
+        if target not in failing:
+            failing[target] = journal_target_failing(target)
+        if failing[target] or not _lock_journal_row(row["id"]):
+            pending += 1
+            continue
+        ok, result = _apply_journal_row(row, doc=doc if target == "paperless" else None)
+        if ok:
+            results[row["kind"]] = result
+        else:
+            failing[target] = result == "target"
+            if result == "permanent":
+                failed += 1
+            else:
+                pending += 1
+    if pending:
+        logger.info(f"{pending} Schritt(e) für Dokument {doc_id} vorgemerkt, Zustellung folgt.", extra={"doc_id": doc_id})
+    return results, pending, failed
+
+def record_status_change(doc_id, new_status, heute, op_key=None):
+    """Status aus der Weboberfläche: Paperless-Felder und Task-Notiz über das Journal."""
+    with document_lock(doc_id):
+        return journal_submit(doc_id, op_key or uuid.uuid4().hex, [
+            ("paperless_fields", {"status": new_status, "datum": heute}),
+            ("task_status", {"status": new_status, "datum": heute}),
+        ])
+
+def _deliver_task_status_batch(rows):
+    """Offene Notiz-Updates gebündelt: Tasks per Batch holen, Notizen per Batch patchen."""
+    single = []
+    gets = []
+    entries = {}
+    for row in rows:
+        entry = index_lookup(row["doc_id"])
+        if entry is None:
+            single.append(row)
+            continue
+        entries[str(row["id"])] = (row, entry)
+        gets.append((str(row["id"]), "get", {"tasklist": entry["tasklist_id"], "task": entry["task_id"]}))
+    patches = []
+    for key, task in batch_execute_tasks(gets).items():
+        row, entry = entries[key]
+        gone = isinstance(task, HttpError) and task.resp.status in (400, 404)
+        if gone or (isinstance(task, dict) and task.get("deleted")):
+            index_forget(row["doc_id"])
+            single.append(row)
+            continue
+        if isinstance(task, Exception):
+            _fail_journal_row(row, task)
+            continue
+        payload = json.loads(row["payload"])
+        notes = build_status_note(task.get("notes"), payload["status"], payload.get("datum"))
+        if notes == (task.get("notes") or ""):
+            _finish_journal_row(row)
+            continue
+        patches.append((key, "patch", {"tasklist": entry["tasklist_id"], "task": task["id"], "body": {"notes": notes}}))
+    # Zwischenzeitlich ersetzte Schritte nicht mehr schreiben
+    patches = [call for call in patches if _journal_row_pending(entries[call[0]][0])]
+    for key, task in batch_execute_tasks(patches).items():
+        row, entry = entries[key]
+        if isinstance(task, Exception):
+            _fail_journal_row(row, task)
+            continue
+        index_store_task(row["doc_id"], entry["tasklist_id"], task)
+        _set_target_down("google", None)
+        _finish_journal_row(row)
+        metrics.inc("paperless_tasks_journal_steps_total", kind=row["kind"])
+    return single
+
+@google_priority("background")
+def deliver_operation_journal():
+    """Stellt fällige offene Schritte in Blöcken zu JOURNAL_BATCH_SIZE zu; Rückgabe: Anzahl bearbeiteter Schritte."""
+    batch_size = get_config("JOURNAL_BATCH_SIZE", 50)
+    handled = 0
+    while True:
+        rows = _claim_journal_rows(batch_size)
+        if not rows:
+            break
+        handled += len(rows)
+        rest = [row for row in rows if row["kind"] != "task_status"]
+        task_status = [row for row in rows if row["kind"] == "task_status"]
+        if task_status:
+            try:
+                rest.extend(_deliver_task_status_batch(task_status))
+            except Exception as e:
+                for row in task_status:
+                    if _journal_row_pending(row):
+                        _fail_journal_row(row, e)
+        down = set()
+        for row in sorted(rest, key=lambda r: r["id"]):
+            target = JOURNAL_STEPS[row["kind"]][0]
+            if target in down:
+                _release_journal_row(row, get_config("JOURNAL_RETRY_SECONDS", 30))
+                continue
+            with document_lock(row["doc_id"]):
+                ok, error_kind = _apply_journal_row(row)
+            if not ok and error_kind == "target":
+                down.add(target)
+        if len(rows) < batch_size:
+            break
+    retention = get_config("JOURNAL_RETENTION_HOURS", 24) * 3600
+    conn = get_state_db()
+    with conn:
+        conn.execute(
+            "DELETE FROM operation_journal WHERE state IN ('done', 'superseded') AND finished_at < ?",
+            (time.time() - retention,),
+        )
+    if handled:
+        logger.info(f"Operations-Journal: {handled} offene(r) Schritt(e) zugestellt oder zurückgestellt.")
+    return handled
+
+def operation_journal_job():
+    """Geplante Zustellung offener Journal-Schritte des aktuellen Mandanten (siehe JobScheduler)."""
+    try:
+        deliver_operation_journal()
+    except TokenError as e:
+        logger.warning("Google-Token ungültig: %s", e)
+
+def journal_stats():
+    rows = get_state_db().execute(
+        "SELECT state, COUNT(*) AS n FROM operation_journal GROUP BY state"
+    ).fetchall()
+    counts = {row["state"]: row["n"] for row in rows}
+    return {"pending": counts.get("pending", 0), "failed": counts.get("failed", 0)}
 
 @app.route("/status/<int:doc_id>", methods=["GET", "POST"])
 def set_status(doc_id):
@@ -426,20 +2695,22 @@ def set_status(doc_id):
     if request.method == "POST":
         new_status = request.form.get("status")
         heute = datetime.date.today().isoformat()
-        set_bearbeitet_am(doc_id, heute)
-        set_bearbeitungsstatus(doc_id, new_status)
-        update_task_note_with_status(doc_id, new_status)
+        _, pending, failed = record_status_change(doc_id, new_status, heute, request.form.get("op_key"))
         close_js = "<script>window.close();</script>" if popup else ""
+        deferred = " Die Übertragung wird nachgeholt." if pending else ""
+        if failed:
+            deferred = " Die Änderung konnte nicht vollständig übertragen werden."
         return (
-            f"<p>Status auf <b>{new_status}</b> gesetzt (bearbeitet am {heute}).{close_js}<br>"
+            f"<p>Status auf <b>{new_status}</b> gesetzt (bearbeitet am {heute}).{deferred}{close_js}<br>"
             f"<a href=\"{get_config('PAPERLESS_URL')}/documents/{doc_id}/\">Zurück zum Dokument</a></p>"
         )
     doc = get_document_meta_by_id(doc_id)
     current_status = get_bearbeitungsstatus(doc)
-    download_link = f"<p><a href='/proxy_download/{doc_id}' download>PDF herunterladen</a></p>"
+    download_link = f"<p><a href='{current_tenant().url_prefix}/proxy_download/{doc_id}' download>PDF herunterladen</a></p>"
     html = f"""
     <h2>Status für Dokument {doc_id} ändern</h2>
     <form method="post">
+      <input type="hidden" name="op_key" value="{uuid.uuid4().hex}">
       <select name="status">
         {''.join([f'<option value="{s}"{" selected" if s==current_status else ""}>{s}</option>' for s in status_options])}
       </select>
@@ -452,46 +2723,446 @@ def set_status(doc_id):
         html = f"<html><head><title>Status</title></head><body style='font-family:sans-serif;margin:20px'>{html}</body></html>"
     return render_template_string(html)
 
-def start_periodic_completed_tasks_update(interval_minutes=5):
-    def job():
-        while True:
+# Google Tasks kennt keine Push-Benachrichtigungen. Der Poller fragt daher kurz
+# nach Aktivität (Webhook, neuer Task) häufig ab und verdoppelt den Abstand,
+# solange nichts passiert, bis POLL_INTERVAL_MINUTES. Die Zeitstempel liegen in
+# der Zustands-DB; so sieht auch ein separater Worker-Prozess Aktivität und
+# /sync-Anforderungen aus dem Web-Prozess, und nach einem Neustart geht es mit
+# dem bisherigen Abstand weiter.
+_scheduler = None
+
+def _state_time(key):
+    return float(get_state_value(key, 0) or 0)
+
+def record_activity():
+    """Merkt Aktivität; der nächste Poller-Lauf kommt dann nach POLL_MIN_SECONDS."""
+    set_state_value("last_activity_at", str(time.time()))
+    if _scheduler is not None:
+        _scheduler.wake()
+
+def request_sync():
+    """Fordert einen sofortigen Poller-Lauf an.
+
+    Gibt False zurück, wenn bereits ein Lauf aussteht oder die letzte
+    Anforderung jünger als SYNC_DEBOUNCE_SECONDS ist.
+    """
+    requested_at = _state_time("sync_requested_at")
+    if requested_at > _state_time("poll_started_at"):
+        return False
+    if time.time() - requested_at < get_config("SYNC_DEBOUNCE_SECONDS", 10):
+        return False
+    set_state_value("sync_requested_at", str(time.time()))
+    if _scheduler is not None:
+        _scheduler.wake()
+    return True
+
+def poll_interval():
+    """Abstand bis zum nächsten Poller-Lauf in Sekunden (siehe completed_tasks_job)."""
+    max_seconds = get_config("POLL_INTERVAL_MINUTES", 5) * 60
+    return min(max_seconds, _state_time("poll_interval_seconds") or max_seconds)
+
+def completed_tasks_job():
+    """Geplanter Poller-Lauf des aktuellen Mandanten (siehe JobScheduler)."""
+    min_seconds = get_config("POLL_MIN_SECONDS", 30)
+    max_seconds = get_config("POLL_INTERVAL_MINUTES", 5) * 60
+    # Nur ein Prozess pollt; die Lease läuft ab, wenn er ausfällt
+    if not acquire_lease("completed_tasks_poller", max_seconds * 2):
+        return
+    previous_start = _state_time("poll_started_at")
+    started = time.time()
+    set_state_value("poll_started_at", str(started))
+    logger.info("Prüfe erledigte Google Tasks ...")
+    summary = update_bearbeitet_am_for_completed_tasks()
+    # Nur erledigte Dokumente zählen als Aktivität; dauerhaft scheiternde würden das Intervall sonst
+    # für immer auf dem Minimum halten (sie stehen getrennt in documents_failed)
+    busy = bool(summary and summary["documents_done"]) or _state_time("last_activity_at") > previous_start
+    if busy:
+        interval = min_seconds
+    else:
+        interval = min(max_seconds, max(min_seconds, _state_time("poll_interval_seconds") * 2))
+    set_state_value("poll_interval_seconds", str(interval))
+    metrics.set("paperless_tasks_poll_interval_seconds", interval, tenant=current_tenant().name)
+
+# ==== PDF-PROXY ====
+PROXY_CHUNK_SIZE = 64 * 1024
+PROXY_REQUEST_HEADERS = ("Range", "If-Range", "If-None-Match", "If-Modified-Since")
+PROXY_RESPONSE_HEADERS = ("Content-Length", "Content-Range", "Accept-Ranges", "ETag", "Last-Modified", "Cache-Control")
+
+def parse_range_header(value, total):
+    """Einfacher Byte-Bereich "bytes=a-b" / "bytes=a-" / "bytes=-n" -> (start, ende) inklusive.
+
+    None, wenn der Header nicht auswertbar ist (dann wird die ganze Datei geliefert),
+    ValueError, wenn der Bereich außerhalb der Datei liegt.
+    """
+    match = re.fullmatch(r"bytes=(\d*)-(\d*)", (value or "").strip())
+    if not match or match.group(1) == match.group(2) == "":
+        return None
+    first, last = match.groups()
+    if first == "":
+        length = int(last)
+        if length == 0:
+            raise ValueError("leerer Bereich")
+        return max(total - length, 0), total - 1
+    start = int(first)
+    end = min(int(last), total - 1) if last else total - 1
+    if start >= total or start > end:
+        raise ValueError("Bereich außerhalb der Datei")
+    return start, end
+
+def _etag_matches(if_none_match, etag):
+    if not if_none_match or not etag:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    normalize = lambda tag: tag.strip().removeprefix("W/")
+    return normalize(etag) in {normalize(t) for t in if_none_match.split(",")}
+
+def _iter_upstream(resp, skip=0, limit=None):
+    # Liest die Antwort stückweise; der Speicherbedarf hängt nicht von der Dateigröße ab
+    try:
+        for chunk in resp.iter_content(chunk_size=PROXY_CHUNK_SIZE):
+            if skip:
+                if len(chunk) <= skip:
+                    skip -= len(chunk)
+                    continue
+                chunk = chunk[skip:]
+                skip = 0
+            if limit is not None:
+                if limit <= 0:
+                    break
+                chunk = chunk[:limit]
+                limit -= len(chunk)
+            if chunk:
+                yield chunk
+    finally:
+        resp.close()
+
+class PdfCache:
+    """Größenbegrenzter PDF-Cache auf der Platte mit LRU-Verdrängung.
+
+    Dateien heißen <doc_id>-<hash(modified)>.pdf; ändert sich das Dokument in
+    Paperless, ergibt sich ein neuer Name und der alte Eintrag wird nie mehr
+    ausgeliefert. Die LRU-Reihenfolge steckt in der mtime der Dateien und
+    übersteht damit Neustarts.
+
+    Mehrere Prozesse (z.B. gunicorn-Worker) dürfen sich das Verzeichnis teilen:
+    maßgeblich ist der Inhalt auf der Platte. Ablegen und Verdrängen laufen
+    unter einer Dateisperre und zählen dabei das ganze Verzeichnis, sodass
+    max_bytes für alle Prozesse zusammen gilt. Unvollständige Downloads
+    (.part) werden erst nach PART_MAX_AGE_SECONDS entfernt, damit laufende
+    Downloads anderer Prozesse nicht verloren gehen.
+    """
+
+    PART_MAX_AGE_SECONDS = 3600
+
+    def __init__(self, directory, max_bytes):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()  # Dateiname -> Größe, älteste zuerst
+        self._size = 0
+        os.makedirs(directory, exist_ok=True)
+        self._load()
+
+    def _scan(self):
+        """(mtime, name, größe) aller PDFs, älteste zuerst; räumt verwaiste .part-Dateien ab."""
+        files = []
+        now = time.time()
+        for entry in os.scandir(self.directory):
             try:
-                print(f"[{datetime.datetime.now().isoformat()}] Prüfe erledigte Google Tasks ...")
-                update_bearbeitet_am_for_completed_tasks()
-            except Exception as e:
-                print("Fehler beim Update-Job:", e)
-            time.sleep(interval_minutes * 60)
-    thread = threading.Thread(target=job, daemon=True)
-    thread.start()
+                if not entry.is_file():
+                    continue
+                stat = entry.stat()
+                if entry.name.endswith(".part"):
+                    if now - stat.st_mtime > self.PART_MAX_AGE_SECONDS:
+                        os.unlink(entry.path)
+                    continue
+            except FileNotFoundError:
+                continue
+            if entry.name.endswith(".pdf"):
+                files.append((stat.st_mtime, entry.name, stat.st_size))
+        return sorted(files)
+
+    def _load(self, files=None):
+        if files is None:
+            files = self._scan()
+        with self._lock:
+            self._entries = OrderedDict((name, size) for _, name, size in files)
+            self._size = sum(self._entries.values())
+
+    @contextmanager
+    def _dir_lock(self):
+        with open(self._path(".lock"), "a") as f:
+            if fcntl is not None:
+                fcntl.flock(f, fcntl.LOCK_EX)
+            yield
+
+    @staticmethod
+    def etag(doc_id, version):
+        return f"{doc_id}-{hashlib.sha1(str(version).encode()).hexdigest()[:16]}"
+
+    def _path(self, name):
+        return os.path.join(self.directory, name)
+
+    def get(self, doc_id, version):
+        # Die Datei kann auch von einem anderen Prozess stammen oder von ihm verdrängt worden sein
+        name = self.etag(doc_id, version) + ".pdf"
+        path = self._path(name)
+        try:
+            os.utime(path)
+            size = os.path.getsize(path)
+        except FileNotFoundError:
+            with self._lock:
+                self._size -= self._entries.pop(name, 0)
+            return None
+        with self._lock:
+            self._size += size - self._entries.pop(name, 0)
+            self._entries[name] = size
+        return path
+
+    def invalidate(self, doc_id):
+        prefix = f"{doc_id}-"
+        with self._lock:
+            for name in [n for n in self._entries if n.startswith(prefix)]:
+                self._remove(name)
+        # Einträge anderer Prozesse
+        for entry in os.scandir(self.directory):
+            if entry.name.startswith(prefix) and entry.name.endswith(".pdf"):
+                try:
+                    os.unlink(entry.path)
+                except FileNotFoundError:
+                    pass
+
+    def _remove(self, name):
+        self._size -= self._entries.pop(name, 0)
+        self._unlink(name)
+
+    def _unlink(self, name):
+        try:
+            os.unlink(self._path(name))
+        except FileNotFoundError:
+            pass
+
+    def _commit(self, doc_id, version, tmp_path):
+        name = self.etag(doc_id, version) + ".pdf"
+        size = os.path.getsize(tmp_path)
+        if size > self.max_bytes:
+            os.unlink(tmp_path)
+            return
+        with self._dir_lock():
+            os.replace(tmp_path, self._path(name))
+            files = []
+            total = 0
+            for mtime, other, other_size in self._scan():
+                # Ältere Stände desselben Dokuments werden nicht mehr gebraucht
+                if other.startswith(f"{doc_id}-") and other != name:
+                    self._unlink(other)
+                    continue
+                files.append((mtime, other, other_size))
+                total += other_size
+            while total > self.max_bytes and files:
+                _, oldest, oldest_size = files.pop(0)
+                self._unlink(oldest)
+                total -= oldest_size
+            self._load(files)
+
+    def store_stream(self, doc_id, version, chunks):
+        """Reicht die Chunks durch und legt die Datei nur bei vollständigem Download im Cache ab."""
+        fd, tmp_path = tempfile.mkstemp(dir=self.directory, suffix=".part")
+        complete = False
+        try:
+            with os.fdopen(fd, "wb") as f:
+                for chunk in chunks:
+                    f.write(chunk)
+                    yield chunk
+            complete = True
+        finally:
+            if hasattr(chunks, "close"):
+                chunks.close()
+            if complete:
+                self._commit(doc_id, version, tmp_path)
+            elif os.path.exists(tmp_path):
+                os.unlink(tmp_path)
+
+    def stats(self):
+        with self._lock:
+            return {"entries": len(self._entries), "bytes": self._size, "max_bytes": self.max_bytes}
+
+def get_pdf_cache():
+    """PDF-Cache des Mandanten; None, wenn PDF_CACHE_MAX_BYTES 0 ist."""
+    key = (
+        get_config("PDF_CACHE_DIR", current_tenant().default_path("pdf_cache")),
+        get_config("PDF_CACHE_MAX_BYTES", 1024 ** 3),
+    )
+    return current_tenant().resource(
+        "pdf_cache", key, lambda: PdfCache(key[0], key[1]) if key[1] > 0 else None
+    )
+
+def _count_bytes(chunks, source, started):
+    """Zählt die ausgelieferten Bytes mit, ohne den Stream zu puffern."""
+    try:
+        for chunk in chunks:
+            metrics.inc("paperless_tasks_pdf_bytes_total", len(chunk), source=source)
+            yield chunk
+    finally:
+        if hasattr(chunks, "close"):
+            chunks.close()
+        metrics.observe("paperless_tasks_pdf_request_seconds", time.perf_counter() - started, source=source)
+
+def _send_cached_pdf(path, doc_id, tag):
+    response = send_file(
+        path,
+        mimetype="application/pdf",
+        download_name=f"paperless_{doc_id}.pdf",
+        conditional=True,
+        etag=tag,
+        max_age=0,
+    )
+    response.headers["Cache-Control"] = "private, no-cache"
+    return response
 
 @app.route("/proxy_download/<int:doc_id>")
 def proxy_download(doc_id):
-    api_url = f"{get_config('PAPERLESS_URL')}/api/documents/{doc_id}/download/"
-    headers = {"Authorization": f"Token {get_config('PAPERLESS_TOKEN')}"}
-    resp = requests.get(api_url, headers=headers)
-    if resp.status_code != 200:
-        return f"Fehler beim Download von Dokument {doc_id}: {resp.text}", 500
+    started = time.perf_counter()
+    cache = get_pdf_cache()
+    version = None
+    if cache is not None:
+        doc = get_document_meta_by_id(doc_id)
+        version = doc.get("modified") if doc else None
+    if version:
+        tag = cache.etag(doc_id, version)
+        path = cache.get(doc_id, version)
+        if path:
+            response = _send_cached_pdf(path, doc_id, tag)
+            metrics.inc("paperless_tasks_pdf_bytes_total", response.content_length or 0, source="cache")
+            metrics.observe("paperless_tasks_pdf_request_seconds", time.perf_counter() - started, source="cache")
+            return response
+        if _etag_matches(request.headers.get("If-None-Match"), f'"{tag}"'):
+            return Response(status=304, headers={"ETag": f'"{tag}"', "Cache-Control": "private, no-cache"})
+    # Ohne Range-Anfrage wird die vollständige Datei geholt und nebenbei im Cache abgelegt
+    cache_fill = version is not None and "Range" not in request.headers
+    if cache_fill:
+        upstream_headers = {}
+    else:
+        upstream_headers = {h: request.headers[h] for h in PROXY_REQUEST_HEADERS if h in request.headers}
+    upstream_headers["Accept-Encoding"] = "identity"
+    try:
+        resp = get_paperless_client().get(
+            f"/api/documents/{doc_id}/download/", headers=upstream_headers, stream=True
+        )
+    except requests.RequestException as e:
+        return f"Fehler beim Download von Dokument {doc_id}: {e}", 500
+    headers = {h: resp.headers[h] for h in PROXY_RESPONSE_HEADERS if h in resp.headers}
+    headers.setdefault("Cache-Control", "private, no-cache")
+    if resp.status_code in (304, 416):
+        resp.close()
+        return Response(status=resp.status_code, headers=headers)
+    if resp.status_code not in (200, 206):
+        text = resp.text
+        resp.close()
+        return f"Fehler beim Download von Dokument {doc_id}: {text}", 500
+    if resp.status_code == 200 and _etag_matches(request.headers.get("If-None-Match"), resp.headers.get("ETag")):
+        resp.close()
+        headers.pop("Content-Length", None)
+        return Response(status=304, headers=headers)
+    headers["Content-Disposition"] = f'inline; filename="paperless_{doc_id}.pdf"'
+    status = resp.status_code
+    body = _iter_upstream(resp)
+    total = resp.headers.get("Content-Length")
+    # Paperless ignoriert Range-Anfragen je nach Version; dann wird hier ausgeschnitten
+    if status == 200 and "Range" in request.headers and total and total.isdigit():
+        headers["Accept-Ranges"] = "bytes"
+        try:
+            byte_range = parse_range_header(request.headers["Range"], int(total))
+        except ValueError:
+            resp.close()
+            return Response(status=416, headers={"Content-Range": f"bytes */{total}"})
+        if byte_range:
+            start, end = byte_range
+            status = 206
+            body = _iter_upstream(resp, skip=start, limit=end - start + 1)
+            headers["Content-Range"] = f"bytes {start}-{end}/{total}"
+            headers["Content-Length"] = str(end - start + 1)
+    if cache_fill and status == 200:
+        headers["ETag"] = f'"{tag}"'
+        body = cache.store_stream(doc_id, version, body)
     return Response(
-        resp.content,
-        mimetype="application/pdf",
-        headers={
-            "Content-Disposition": f'inline; filename="paperless_{doc_id}.pdf"'
-        }
+        _count_bytes(body, "upstream", started),
+        status=status,
+        mimetype=resp.headers.get("Content-Type", "application/pdf").split(";")[0],
+        headers=headers,
+        direct_passthrough=True,
     )
 
+@app.route("/stats")
+def stats():
+    return jsonify({
+        "tenant": current_tenant().name,
+        "paperless": get_paperless_client().stats(),
+        "webhook_queue": webhook_queue_stats(),
+        "pdf_cache": (get_pdf_cache().stats() if get_pdf_cache() else None),
+        "document_cache": (get_document_cache().stats() if get_document_cache() else None),
+        "last_completed_tasks_run": json.loads(get_state_value("last_completed_tasks_run", "null")),
+        "poll_interval_seconds": poll_interval(),
+        "operation_journal": journal_stats(),
+        "google_quota": get_google_quota().stats(),
+    })
+
+@app.route("/sync", methods=["POST"])
+def sync():
+    accepted = request_sync()
+    metrics.inc("paperless_tasks_sync_requests_total", result="accepted" if accepted else "debounced")
+    return jsonify({
+        "tenant": current_tenant().name,
+        "accepted": accepted,
+        "poll_interval_seconds": poll_interval(),
+    }), 202
+
+@app.route("/webhook_dead_letter/redrive", methods=["POST"])
+def redrive_dead_letters():
+    count = redrive_webhook_dead_letters(request.values.get("doc_id"))
+    return jsonify({"tenant": current_tenant().name, "requeued": count})
+
+@app.route("/metrics")
+def metrics_endpoint():
+    # Prozessweit: Zustandswerte werden für alle Mandanten erhoben
+    for tenant in get_tenants():
+        with tenant_context(tenant):
+            name = tenant.name
+            quota = get_google_quota().stats()
+            metrics.set("paperless_tasks_google_quota_daily_remaining", quota["daily_remaining"], tenant=name)
+            metrics.set("paperless_tasks_google_quota_tokens_available", quota["tokens_available"], tenant=name)
+            metrics.set("paperless_tasks_google_quota_effective_per_minute", quota["effective_per_minute"], tenant=name)
+            queue = webhook_queue_stats()
+            metrics.set("paperless_tasks_webhook_queue_pending", queue["pending"], tenant=name)
+            metrics.set("paperless_tasks_webhook_dead_letter", queue["dead_letter"], tenant=name)
+            journal = journal_stats()
+            metrics.set("paperless_tasks_journal_pending", journal["pending"], tenant=name)
+            metrics.set("paperless_tasks_journal_failed", journal["failed"], tenant=name)
+            cache = get_pdf_cache()
+            if cache:
+                metrics.set("paperless_tasks_pdf_cache_bytes", cache.stats()["bytes"], tenant=name)
+    return Response(metrics.render(), mimetype="text/plain; version=0.0.4")
+
 @app.route("/view_pdf/<int:doc_id>", methods=["GET", "POST"])
 def view_pdf(doc_id):
     status_options = list(get_config("STATUS_LABEL_TO_ID").keys())
     message = None
+    doc = None
     if request.method == "POST":
         new_status = request.form.get("status")
         heute = datetime.date.today().isoformat()
-        set_bearbeitet_am(doc_id, heute)
-        set_bearbeitungsstatus(doc_id, new_status)
-        update_task_note_with_status(doc_id, new_status)
+        # Die PATCH-Antwort enthält das aktualisierte Dokument, ein weiteres GET entfällt
+        results, pending, failed = record_status_change(doc_id, new_status, heute, request.form.get("op_key"))
+        doc = results.get("paperless_fields")
         message = f"Status auf <b>{new_status}</b> gesetzt (am {heute})."
+        if failed:
+            message += " Die Änderung konnte nicht vollständig übertragen werden."
+        elif pending:
+            message += " Die Übertragung wird nachgeholt."
 
-    doc = get_document_meta_by_id(doc_id)
+    if doc is None:
+        doc = get_document_meta_by_id(doc_id)
     current_status = get_bearbeitungsstatus(doc)
 
     options_html = ''.join([
@@ -501,13 +3172,14 @@ def view_pdf(doc_id):
 
     side_html = f"""
         <form method='post'>
+          <input type='hidden' name='op_key' value='{uuid.uuid4().hex}'>
           <select name='status'>
             {options_html}
           </select>
           <button type='submit'>Speichern</button>
         </form>
         <p>Aktueller Status: <b>{current_status}</b></p>
-        <p><a href='/proxy_download/{doc_id}' download>PDF herunterladen</a></p>
+        <p><a href='{current_tenant().url_prefix}/proxy_download/{doc_id}' download>PDF herunterladen</a></p>
         {f'<div style="color:green">{message}</div>' if message else ''}
     """
 
@@ -525,7 +3197,7 @@ def view_pdf(doc_id):
       <body>
         <div class="container">
           <div class="pdf">
-            <embed src="/proxy_download/{doc_id}" width="100%" height="100%" type="application/pdf">
+            <embed src="{current_tenant().url_prefix}/proxy_download/{doc_id}" width="100%" height="100%" type="application/pdf">
           </div>
           <div class="side">
             {side_html}
@@ -536,10 +3208,108 @@ def view_pdf(doc_id):
     """)
 
     # === CONFIG-ADMIN-UI ===
+class UpstreamCache:
+    """Auswahllisten für /config (Google-Tasklisten, Custom Fields) mit TTL und stale-while-revalidate.
+
+    Bis ttl Sekunden gilt ein Eintrag als frisch. Danach wird er weitere stale
+    Sekunden sofort ausgeliefert, während im Hintergrund neu geladen wird; erst
+    ein noch älterer oder fehlender Eintrag muss abgewartet werden. Je Eintrag
+    läuft höchstens ein Ladevorgang, und bei einem Fehler bleibt der alte Wert
+    erhalten.
+    """
+
+    def __init__(self, ttl, stale):
+        self.ttl = ttl
+        self.stale = stale
+        self._lock = threading.Lock()
+        self._entries = {}  # name -> (wert, geladen_um)
+        self._pending = {}  # name -> Future
+        self._errors = {}
+
+    def fetch(self, name, loader, force=False):
+        """Stößt ggf. das Laden an; gibt das Future zurück, wenn der Cache nichts Brauchbares hat."""
+        with self._lock:
+            entry = self._entries.get(name)
+            age = time.time() - entry[1] if entry else None
+            if entry and age <= self.ttl and not force:
+                return None
+            future = self._pending.get(name)
+            if future is None:
+                future = _lookup_pool.submit(self._load, current_tenant(), name, loader)
+                self._pending[name] = future
+            if entry and age <= self.ttl + self.stale and not force:
+                return None
+            return future
+
+    def _load(self, tenant, name, loader):
+        try:
+            with tenant_context(tenant):
+                value = loader()
+            with self._lock:
+                self._entries[name] = (value, time.time())
+                self._errors.pop(name, None)
+        except Exception as e:
+            logger.error(f"Fehler beim Laden von {name}: {e}")
+            with self._lock:
+                self._errors[name] = str(e)
+        finally:
+            with self._lock:
+                self._pending.pop(name, None)
+
+    def get(self, name):
+        """(wert, geladen_um, lädt_gerade, letzter_fehler); wert ist None, wenn nie geladen."""
+        with self._lock:
+            value, loaded_at = self._entries.get(name, (None, None))
+            return value, loaded_at, name in self._pending, self._errors.get(name)
+
+_lookup_pool = ThreadPoolExecutor(max_workers=4, thread_name_prefix="lookup")
+
+def get_upstream_cache():
+    key = (
+        get_config("PAPERLESS_URL"),
+        get_config("GOOGLE_TASKS_TOKEN"),
+        get_config("CONFIG_LOOKUP_TTL_SECONDS", 300),
+        get_config("CONFIG_LOOKUP_STALE_SECONDS", 3600),
+    )
+    return current_tenant().resource("upstream_cache", key, lambda: UpstreamCache(key[2], key[3]))
+
+CONFIG_LOOKUPS = (
+    ("task_lists", "Google-Tasklisten", fetch_task_lists),
+    ("custom_fields", "Custom Fields", refresh_custom_fields),
+)
+
+def load_config_lookups(force=False):
+    """Lädt die Auswahllisten parallel; wartet höchstens CONFIG_LOOKUP_TIMEOUT_SECONDS."""
+    cache = get_upstream_cache()
+    futures = [cache.fetch(name, loader, force) for name, _, loader in CONFIG_LOOKUPS]
+    futures = [future for future in futures if future is not None]
+    if futures:
+        wait_futures(futures, timeout=get_config("CONFIG_LOOKUP_TIMEOUT_SECONDS", 2))
+    return {name: cache.get(name) for name, _, _ in CONFIG_LOOKUPS}
+
+def lookup_freshness_html(lookups):
+    parts = []
+    now = time.time()
+    for name, label, _ in CONFIG_LOOKUPS:
+        value, loaded_at, loading, error = lookups[name]
+        if loaded_at is None:
+            text = "wird geladen …" if loading else f"nicht verfügbar ({error})" if error else "nicht verfügbar"
+        else:
+            age = int(now - loaded_at)
+            text = f"Stand vor {age} s" if age < 120 else f"Stand vor {age // 60} min"
+            if loading:
+                text += ", wird aktualisiert"
+            elif error:
+                text += f", Aktualisierung fehlgeschlagen ({error})"
+        parts.append(f"{label}: {text}")
+    return " · ".join(parts)
+
 @app.route("/config", methods=["GET", "POST"])
 def config_ui():
     config = load_config()
     message = None
+    lookups = load_config_lookups(force=request.args.get("refresh") == "1")
+    custom_fields = lookups["custom_fields"][0]
 
     if request.method == "POST":
         # Spezielle Felder aus Dropdowns
@@ -561,17 +3331,21 @@ def config_ui():
                 except Exception:
                     config[key] = value
 
-        # Mapping automatisch aus Custom Field ermitteln
-        mapping = get_status_mapping_from_field(config.get("CUSTOM_FIELD_STATUS"))
+        # Mapping automatisch aus Custom Field ermitteln (aus dem Cache, ohne zusätzlichen Aufruf)
+        status_field = next(
+            (cf for cf in custom_fields or () if cf.get("id") == config.get("CUSTOM_FIELD_STATUS")), None
+        )
+        mapping = status_mapping_from_field(status_field)
         if mapping:
             config["STATUS_LABEL_TO_ID"] = mapping
 
         save_config(config)
         message = "Konfiguration gespeichert."
+        if status_field is None:
+            message += " STATUS_LABEL_TO_ID wurde nicht aktualisiert, da das Status-Feld nicht geladen ist."
 
     # HTML-Formular generieren
-    task_lists = fetch_task_lists()
-    custom_fields = fetch_custom_fields()
+    task_lists = lookups["task_lists"][0]
 
     html_fields = ""
     hidden_keys = {"GOOGLE_CLIENT_ID", "GOOGLE_CLIENT_SECRET", "GOOGLE_TASKS_TOKEN", "SCOPES"}
@@ -611,13 +3385,15 @@ def config_ui():
           body {{ font-family: sans-serif; margin: 40px; background: #f8f8fa; }}
           input[type="text"], textarea {{ width: 80%; border-radius: 6px; border: 1px solid #bbb; padding: 6px; }}
           label {{ font-weight: bold; margin-top: 12px; display: block; }}
+          .fresh {{ color: #666; font-size: 0.9em; }}
           .save {{ margin-top: 18px; padding: 10px 18px; background: #4186e0; color: white; border-radius: 7px; border: none; font-size: 1.1em; }}
         </style>
       </head>
       <body>
         <h2>Konfiguration bearbeiten</h2>
         {f"<div style='color:green'>{message}</div>" if message else ""}
-        <form method="POST">
+        <p class="fresh">{lookup_freshness_html(lookups)} · <a href="?refresh=1">aktualisieren</a></p>
+        <form method="POST" action="{request.path}">
             {html_fields}
             <button class="save" type="submit">Speichern</button>
         </form>
@@ -629,14 +3405,466 @@ def config_ui():
     return html
 
 
+# ==== MANDANTEN-ROUTEN ====
+# Jede mandantenbezogene Route gibt es zusätzlich unter /t/<mandant>/...; der
+# Mandant wird vor dem View gesetzt und nach dem Request zurückgenommen.
+TENANT_ENDPOINTS = ("paperless_webhook", "set_status", "proxy_download", "view_pdf", "stats", "sync",
+                    "redrive_dead_letters", "config_ui", "authorize")
+
+def register_tenant_routes():
+    for rule in list(app.url_map.iter_rules()):
+        if rule.endpoint in TENANT_ENDPOINTS:
+            app.add_url_rule(
+                "/t/<tenant>" + rule.rule,
+                endpoint=f"tenant_{rule.endpoint}",
+                view_func=app.view_functions[rule.endpoint],
+                methods=rule.methods,
+            )
+
+@app.url_value_preprocessor
+def select_tenant(endpoint, values):
+    if values and "tenant" in values:
+        tenant = get_tenant(values.pop("tenant"))
+        if tenant is None or tenant.is_default:
+            abort(404)
+        _tenant_local.tenant = tenant
+
+@app.teardown_request
+def reset_tenant(error=None):
+    _tenant_local.tenant = None
+
+register_tenant_routes()
+
+# ==== BACKFILL ====
+BACKFILL_FIELDS = "id,title,document_type,correspondent,added,modified,custom_fields"
+
+def _backfill_query():
+    config = get_config_snapshot()
+    params = {
+        "page_size": config.get("BACKFILL_PAGE_SIZE", 250),
+        "ordering": "id",
+        "fields": BACKFILL_FIELDS,
+    }
+    done_id = config.status_label_to_id.get(config.get("STATUS_LABEL_DONE", "Erledigt"))
+    conditions = [[config.get("CUSTOM_FIELD_AKTION"), "gt", config.get("ACTION_THRESHOLD")]]
+    if done_id:
+        conditions.append(["NOT", [config.get("CUSTOM_FIELD_STATUS"), "exact", done_id]])
+    params["custom_field_query"] = json.dumps(["AND", conditions])
+    return params
+
+@google_priority("background")
+def backfill_tasks(dry_run=False, restart=False):
+    """Legt fehlende Tasks für bereits vorhandene Paperless-Dokumente an.
+
+    Der Task-Index wird vorher in einem Durchlauf über alle Listen aufgebaut,
+    Paperless filtert serverseitig über custom_field_query (AKTION > Schwelle,
+    Status != erledigt). Neue Tasks werden per Batch angelegt. Der Fortschritt
+    (Seite, letzte Dokument-ID) wird nach jedem Batch gespeichert; ein
+    abgebrochener Lauf setzt dort wieder auf.
+    """
+    checkpoint = None if restart else json.loads(get_state_value("backfill_checkpoint", "null"))
+    start_page = max(1, checkpoint["page"] - 1) if checkpoint else 1
+    last_id = checkpoint["last_id"] if checkpoint else 0
+    if checkpoint:
+        logger.info(f"Setze Backfill ab Dokument {last_id} fort (Seite {start_page}).")
+    reconcile_task_index()
+
+    params = _backfill_query()
+    documents = iter_paperless_results("/api/documents/", params, start_page)
+    try:
+        first = next(documents, None)
+    except requests.HTTPError as e:
+        if e.response is None or e.response.status_code != 400:
+            raise
+        # Ältere Paperless-Versionen kennen custom_field_query nicht; dann wird nur lokal gefiltert
+        logger.warning("custom_field_query wird nicht unterstützt, filtere lokal.")
+        params.pop("custom_field_query")
+        documents = iter_paperless_results("/api/documents/", params, start_page)
+        first = next(documents, None)
+    if first is not None:
+        documents = itertools.chain([first], documents)
+
+    list_id = get_config("ACTION_TASK_LIST_ID")
+    status_new = get_config("STATUS_LABEL_NEW", "Unbearbeitet")
+    batch_size = get_config("GOOGLE_BATCH_SIZE", 50)
+    pending = []
+    counts = {"checked": 0, "created": 0, "failed": 0}
+
+    def flush(page):
+        calls = []
+        for doc in pending:
+            doc_id = str(doc["id"])
+            if index_lookup(doc_id):
+                continue
+            calls.append((doc_id, "insert", {
+                "tasklist": list_id,
+                "body": {"title": doc.get("title", "Paperless-Dokument"), "notes": build_task_notes(doc_id, doc)},
+            }))
+        docs = {str(doc["id"]): doc for doc in pending}
+        results = batch_execute_tasks(calls)
+        for doc_id, result in results.items():
+            if isinstance(result, dict):
+                index_store_task(doc_id, list_id, result)
+                # Das gelistete Dokument kann inzwischen veraltet sein: Status wie beim Webhook über das
+                # Journal setzen (frisch geladen, unter der Dokument-Sperre, bei Fehlern nachgeliefert)
+                with document_lock(doc_id):
+                    journal_submit(doc_id, f"{doc_id}:backfill:{docs[doc_id].get('modified', '')}", [
+                        ("paperless_status", {"status": status_new}),
+                    ])
+                counts["created"] += 1
+            else:
+                logger.error(f"Task für Dokument {doc_id} konnte nicht angelegt werden: {result}", extra={"doc_id": doc_id})
+                counts["failed"] += 1
+        set_state_value("backfill_checkpoint", json.dumps({"page": page, "last_id": pending[-1]["id"]}))
+        pending.clear()
+
+    page = start_page
+    for page, doc in documents:
+        if doc["id"] <= last_id:
+            continue
+        counts["checked"] += 1
+        if not needs_task(doc) or index_lookup(doc["id"]):
+            continue
+        if dry_run:
+            logger.info(f"[dry-run] Würde Task anlegen: {doc['id']} – {doc.get('title')}", extra={"doc_id": doc["id"]})
+            counts["created"] += 1
+            continue
+        pending.append(doc)
+        if len(pending) >= batch_size:
+            flush(page)
+    if pending:
+        flush(page)
+    if not dry_run:
+        set_state_value("backfill_checkpoint", "null")
+    prefix = "[dry-run] " if dry_run else ""
+    logger.info(
+        f"{prefix}Backfill fertig: {counts['checked']} Dokument(e) geprüft, "
+        f"{counts['created']} Task(s) angelegt, {counts['failed']} fehlgeschlagen."
+    )
+    return counts
+
+# ==== BETRIEB (Server/Worker) ====
+class JobScheduler:
+    """Ein Scheduler-Thread für die periodischen Jobs aller Mandanten.
+
+    Die Läufe selbst gehen an einen Pool mit SCHEDULER_WORKERS Threads. Ein Job
+    wird erst nach dem Ende seines Laufs neu eingeplant und läuft daher nie
+    doppelt. Beim Start wird an den gespeicherten letzten Lauf angeknüpft;
+    Jobs ohne bisherigen Lauf werden über ihr Intervall verteilt, damit nicht
+    alle Mandanten gleichzeitig Google abfragen. Alle SCHEDULER_CHECK_SECONDS
+    (oder sofort nach wake()) werden Aktivität und /sync-Anforderungen geprüft
+    und der Poller ggf. vorgezogen. Neue Mandanten kommen beim nächsten Abgleich
+    der Mandantenliste hinzu.
+    """
+
+    # (Name, Funktion, Intervall in Sekunden; beide laufen im Kontext des Mandanten)
+    JOBS = (
+        ("completed_tasks_poller", completed_tasks_job, poll_interval),
+        ("task_index_reconcile", task_index_reconcile_job,
+         lambda: get_config("TASK_INDEX_RECONCILE_MINUTES", 60) * 60),
+        ("operation_journal", operation_journal_job, lambda: get_config("JOURNAL_RETRY_SECONDS", 30)),
+    )
+    POLLER = "completed_tasks_poller"
+    # Laufen beim Start sofort (offene Journal-Schritte nachliefern)
+    STARTUP_JOBS = ("operation_journal",)
+    TENANT_REFRESH_SECONDS = 60
+
+    def __init__(self, workers, check_seconds=5):
+        self.check_seconds = check_seconds
+        self._pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="scheduler")
+        self._cond = threading.Condition()
+        self._queue = []
+        self._due = {}
+        self._running = set()
+        self._futures = set()
+        self._tenants = {}
+        self._activity_seen = {}
+        self._seq = itertools.count()
+        self._woken = False
+        self._stopping = False
+        self._thread = None
+
+    def wake(self):
+        with self._cond:
+            self._woken = True
+            self._cond.notify()
+
+    def _schedule(self, tenant, job, delay):
+        # Ältere Einträge desselben Jobs bleiben in der Queue und werden beim Abholen verworfen
+        key = (tenant.name, job[0])
+        due = time.monotonic() + max(0.0, delay)
+        self._due[key] = due
+        heapq.heappush(self._queue, (due, next(self._seq), tenant, job))
+        self._cond.notify()
+
+    def _in_tenant(self, tenant, func, default=None):
+        try:
+            with tenant_context(tenant):
+                return func()
+        except Exception as e:
+            logger.error(f"Zustand von Mandant {tenant.name} nicht lesbar: {e}")
+            return default
+
+    def sync_tenants(self):
+        tenants = get_tenants()
+        with self._cond:
+            for job in self.JOBS:
+                new = [t for t in tenants if (t.name, job[0]) not in self._due]
+                for index, tenant in enumerate(new):
+                    interval = self._in_tenant(tenant, job[2], 300)
+                    last_run = self._in_tenant(tenant, lambda: _state_time(f"scheduler_{job[0]}_at"), 0)
+                    if job[0] in self.STARTUP_JOBS:
+                        delay = 0
+                    elif last_run:
+                        delay = last_run + interval - time.time()
+                    else:
+                        delay = interval * index / len(new)
+                    self._tenants[tenant.name] = tenant
+                    self._schedule(tenant, job, delay)
+            for name in set(self._tenants) - {t.name for t in tenants}:
+                del self._tenants[name]
+
+    def _poller_state(self, tenant):
+        return (
+            _state_time("sync_requested_at"),
+            _state_time("poll_started_at"),
+            _state_time("last_activity_at"),
+            get_config("POLL_MIN_SECONDS", 30),
+        )
+
+    def check_triggers(self):
+        """Zieht den Poller bei /sync sofort und nach Aktivität auf POLL_MIN_SECONDS vor."""
+        poller = next(job for job in self.JOBS if job[0] == self.POLLER)
+        for tenant in list(self._tenants.values()):
+            state = self._in_tenant(tenant, lambda: self._poller_state(tenant))
+            if state is None:
+                continue
+            sync_at, started_at, activity_at, min_seconds = state
+            key = (tenant.name, self.POLLER)
+            with self._cond:
+                if key in self._running:
+                    continue
+                remaining = self._due.get(key, 0) - time.monotonic()
+                if sync_at > started_at:
+                    if remaining > 0:
+                        self._schedule(tenant, poller, 0)
+                elif activity_at > self._activity_seen.get(tenant.name, 0):
+                    self._activity_seen[tenant.name] = activity_at
+                    if remaining > min_seconds:
+                        self._schedule(tenant, poller, min_seconds)
+
+    def _run(self, tenant, job):
+        name = job[0]
+        self._in_tenant(tenant, lambda: set_state_value(f"scheduler_{name}_at", str(time.time())))
+        try:
+            with tenant_context(tenant):
+                job[1]()
+        except Exception as e:
+            logger.exception(f"Fehler im Job {name} (Mandant {tenant.name}): {e}")
+        interval = self._in_tenant(tenant, job[2], 300)
+        with self._cond:
+            self._running.discard((tenant.name, name))
+            if self._stopping:
+                return
+            if self._tenants.get(tenant.name) is tenant:
+                self._schedule(tenant, job, interval)
+                # Während des Laufs eingegangene /sync-Anforderungen prüfen
+                self._woken = True
+            else:
+                self._due.pop((tenant.name, name), None)
+
+    def loop(self):
+        next_refresh = next_check = 0.0
+        while True:
+            now = time.monotonic()
+            if now >= next_refresh:
+                self.sync_tenants()
+                next_refresh = now + self.TENANT_REFRESH_SECONDS
+            if now >= next_check or self._woken:
+                self._woken = False
+                self.check_triggers()
+                next_check = now + self.check_seconds
+            with self._cond:
+                if self._stopping:
+                    return
+                while self._queue and self._due.get((self._queue[0][2].name, self._queue[0][3][0])) != self._queue[0][0]:
+                    heapq.heappop(self._queue)
+                if not self._queue or self._queue[0][0] > now:
+                    due = self._queue[0][0] if self._queue else next_refresh
+                    if not self._woken:
+                        self._cond.wait(max(0.0, min(due, next_refresh, next_check) - now))
+                    continue
+                _, _, tenant, job = heapq.heappop(self._queue)
+                self._running.add((tenant.name, job[0]))
+                self._due[(tenant.name, job[0])] = None
+                future = self._pool.submit(self._run, tenant, job)
+                self._futures.add(future)
+                future.add_done_callback(self._futures.discard)
+
+    def start(self):
+        self._thread = threading.Thread(target=self.loop, daemon=True, name="scheduler")
+        self._thread.start()
+        return self
+
+    def stop(self, timeout=30):
+        """Nimmt keine neuen Läufe an und wartet höchstens timeout Sekunden auf laufende."""
+        with self._cond:
+            self._stopping = True
+            self._cond.notify_all()
+        if self._thread is not None:
+            self._thread.join(timeout)
+        self._pool.shutdown(wait=False, cancel_futures=True)
+        done, pending = wait_futures(list(self._futures), timeout=timeout)
+        return not pending
+
+_background_threads = []
+
+def start_background_jobs():
+    global _scheduler
+    _shutdown.clear()
+    _scheduler = JobScheduler(
+        get_config("SCHEDULER_WORKERS", 2), check_seconds=get_config("SCHEDULER_CHECK_SECONDS", 5)
+    ).start()
+    _background_threads[:] = start_webhook_workers()
+
+def stop_background_jobs(timeout=None):
+    """Beendet Scheduler und Webhook-Worker; laufende Jobs dürfen zu Ende laufen."""
+    global _scheduler
+    if timeout is None:
+        timeout = get_config("SHUTDOWN_TIMEOUT_SECONDS", 30)
+    deadline = time.monotonic() + timeout
+    _shutdown.set()
+    _webhook_wakeup.set()
+    clean = True
+    if _scheduler is not None:
+        clean = _scheduler.stop(timeout)
+        _scheduler = None
+    for thread in _background_threads:
+        thread.join(max(0.0, deadline - time.monotonic()))
+        clean = clean and not thread.is_alive()
+    if not clean:
+        logger.warning("Nicht alle Hintergrundjobs wurden rechtzeitig beendet.")
+    return clean
+
+def create_app(start_background=False):
+    """WSGI-App-Factory, z.B. für gunicorn 'paperless_task_integration:create_app()'.
+
+    Hintergrundjobs laufen standardmäßig im separaten Worker-Prozess
+    (python3 paperless_task_integration.py worker), nicht in jedem Web-Worker.
+    """
+    if start_background:
+        start_background_jobs()
+    return app
+
+def serve():
+    """Startet die Web-App mit einem Produktions-WSGI-Server (gunicorn, sonst waitress)."""
+    host = get_config("SERVER_HOST", "0.0.0.0")
+    port = int(get_config("SERVER_PORT", 8080))
+    workers = int(get_config("WEB_WORKERS", 2))
+    threads = int(get_config("WEB_THREADS", 8))
+    logger.info(f"Starte Webhook-Empfänger auf http://{host}:{port}/paperless_webhook")
+    try:
+        from gunicorn.app.base import BaseApplication
+    except ImportError:
+        BaseApplication = None
+    if BaseApplication is not None:
+        class GunicornApp(BaseApplication):
+            def load_config(self):
+                self.cfg.set("bind", f"{host}:{port}")
+                self.cfg.set("workers", workers)
+                self.cfg.set("threads", threads)
+                self.cfg.set("worker_class", "gthread")
+
+            def load(self):
+                return create_app()
+
+        GunicornApp().run()
+        return
+    try:
+        from waitress import serve as waitress_serve
+    except ImportError:
+        raise SystemExit("Für 'serve' wird gunicorn oder waitress benötigt: pip install gunicorn")
+    # waitress arbeitet mit einem Prozess und mehreren Threads
+    waitress_serve(create_app(), host=host, port=port, threads=threads)
+
+def start_metrics_listener():
+    """Stellt /metrics des Worker-Prozesses auf METRICS_PORT bereit (ohne Angabe kein Listener).
+
+    Die Zähler sind je Prozess; Poller, Journal und Webhook-Warteschlange laufen
+    im Worker und wären über die Web-Prozesse nie zu sehen.
+    """
+    port = get_config("METRICS_PORT")
+    if not port:
+        return None
+    host = get_config("SERVER_HOST", "0.0.0.0")
+    metrics_app = Flask("paperless_tasks_metrics")
+    metrics_app.add_url_rule("/metrics", "metrics", metrics_endpoint)
+    server = make_server(host, int(port), metrics_app, threaded=True)
+    threading.Thread(target=server.serve_forever, name="metrics", daemon=True).start()
+    logger.info(f"Metriken des Workers unter http://{host}:{port}/metrics")
+    return server
+
+def run_worker():
+    """Eigener Prozess für Poller, Index-Abgleich und Webhook-Warteschlange."""
+    stop = threading.Event()
+    signal.signal(signal.SIGTERM, lambda *_: stop.set())
+    signal.signal(signal.SIGINT, lambda *_: stop.set())
+    logger.info(f"Worker {PROCESS_ID} gestartet.")
+    metrics_server = start_metrics_listener()
+    start_background_jobs()
+    stop.wait()
+    logger.info("Worker wird beendet ...")
+    stop_background_jobs()
+    if metrics_server is not None:
+        metrics_server.shutdown()
+    for tenant in get_tenants():
+        with tenant_context(tenant):
+            for name in ("completed_tasks_poller", "task_index_reconcile"):
+                release_lease(name)
+    logger.info("Worker beendet.")
+
+def cli_tenant(args):
+    """Mandant aus "--tenant NAME" (Standard: default)."""
+    if "--tenant" not in args:
+        return _default_tenant
+    index = args.index("--tenant")
+    name = args[index + 1] if index + 1 < len(args) else None
+    tenant = get_tenant(name)
+    if tenant is None:
+        raise SystemExit(f"Unbekannter Mandant: {name}")
+    return tenant
+
 if __name__ == "__main__":
     if len(sys.argv) > 1 and sys.argv[1] == "update_tasks":
-        update_bearbeitet_am_for_completed_tasks()
+        with tenant_context(cli_tenant(sys.argv[2:])):
+            update_bearbeitet_am_for_completed_tasks(full="--full" in sys.argv[2:])
+    elif len(sys.argv) > 1 and sys.argv[1] == "backfill":
+        with tenant_context(cli_tenant(sys.argv[2:])):
+            # Ohne Request gibt es keine Basis-URL für die Links in den Notizen
+            if not get_config("SERVER_BASE_URL"):
+                raise SystemExit("Für 'backfill' muss SERVER_BASE_URL gesetzt sein.")
+            backfill_tasks(dry_run="--dry-run" in sys.argv[2:], restart="--restart" in sys.argv[2:])
+    elif len(sys.argv) > 1 and sys.argv[1] == "redrive":
+        # redrive [DOC_ID] [--tenant NAME]: aufgegebene Webhook-Ereignisse erneut einreihen
+        args = sys.argv[2:]
+        if "--tenant" in args:
+            index = args.index("--tenant")
+            args = args[:index] + args[index + 2:]
+        with tenant_context(cli_tenant(sys.argv[2:])):
+            if not redrive_webhook_dead_letters(args[0] if args else None):
+                logger.info("Keine aufgegebenen Webhook-Ereignisse gefunden.")
+    elif len(sys.argv) > 1 and sys.argv[1] == "serve":
+        serve()
+    elif len(sys.argv) > 1 and sys.argv[1] == "worker":
+        run_worker()
     else:
-        start_periodic_completed_tasks_update(interval_minutes=5)
+        start_background_jobs()
         host = get_config("SERVER_HOST", "0.0.0.0")
         port = int(get_config("SERVER_PORT", 8080))
-        print(
+        logger.info(
             f"Starte Webhook-Empfänger auf http://{host}:{port}/paperless_webhook"
         )
-        app.run(host=host, port=port)
+        try:
+            app.run(host=host, port=port)
+        finally:
+            stop_background_jobs()
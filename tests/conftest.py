@@ -0,0 +1,13 @@
+import json
+import os
+import sys
+import tempfile
+
+# Das Modul liest CONFIG_PATH beim Import; für die Tests genügt eine leere Konfiguration
+_config_dir = tempfile.mkdtemp(prefix="pti-tests-")
+_config_path = os.path.join(_config_dir, "config.json")
+with open(_config_path, "w") as f:
+    json.dump({}, f)
+os.environ.setdefault("CONFIG_PATH", _config_path)
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
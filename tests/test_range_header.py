@@ -0,0 +1,26 @@
+import pytest
+
+from paperless_task_integration import parse_range_header
+
+
+@pytest.mark.parametrize("value, expected", [
+    ("bytes=0-99", (0, 99)),
+    ("bytes=100-", (100, 999)),
+    ("bytes=-100", (900, 999)),
+    ("bytes=-5000", (0, 999)),
+    ("bytes=990-5000", (990, 999)),
+    (" bytes=0-0 ", (0, 0)),
+])
+def test_valid_ranges(value, expected):
+    assert parse_range_header(value, 1000) == expected
+
+
+@pytest.mark.parametrize("value", [None, "", "bytes=-", "items=0-10", "bytes=0-10,20-30", "bytes=a-b"])
+def test_unparseable_header_means_whole_file(value):
+    assert parse_range_header(value, 1000) is None
+
+
+@pytest.mark.parametrize("value", ["bytes=1000-", "bytes=500-100", "bytes=-0"])
+def test_unsatisfiable_ranges(value):
+    with pytest.raises(ValueError):
+        parse_range_header(value, 1000)
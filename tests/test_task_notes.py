@@ -0,0 +1,86 @@
+import pytest
+
+from paperless_task_integration import (
+    NOTE_FORMAT_VERSION,
+    TaskNote,
+    build_status_note,
+    get_doc_id_from_notes,
+    parse_task_note,
+)
+
+VERSIONED = (
+    "Status: Weitergeleitet (am 2024-03-05)\n"
+    "Status bearbeiten: https://server/status/42?popup=1\n"
+    "Typ: Rechnung\n"
+    "Person: Stadtwerke\n"
+    "Hinzugefügt am: 2024-03-01\n"
+    "Web-Ansicht: https://paperless/documents/42/\n"
+    "PDF-Ansicht: https://server/view_pdf/42\n"
+    "Dokument-ID: 42\n"
+    "Rückfrage bei Anna\n"
+    "Notizformat: 1"
+)
+
+
+def test_parse_versioned_note():
+    note = parse_task_note(VERSIONED)
+    assert note.version == NOTE_FORMAT_VERSION
+    assert note.status == "Weitergeleitet"
+    assert note.date == "2024-03-05"
+    assert note.doc_type == "Rechnung"
+    assert note.correspondent == "Stadtwerke"
+    assert note.pdf_link == "https://server/view_pdf/42"
+    assert note.doc_id == "42"
+    assert note.extra == ("Rückfrage bei Anna",)
+
+
+def test_versioned_note_round_trip():
+    assert parse_task_note(VERSIONED).render() == VERSIONED
+
+
+def test_parse_legacy_note_without_version():
+    note = parse_task_note("Status: Unbearbeitet\nTyp: Brief\nDokument-ID: 7")
+    assert note.version == 0
+    assert note.status == "Unbearbeitet"
+    assert note.date is None
+    assert note.doc_type == "Brief"
+    assert note.doc_id == "7"
+    assert note.extra == ()
+
+
+def test_parse_legacy_doc_id_inside_text():
+    # Sehr alte Notizen hatten die Dokument-ID mitten im Fließtext
+    note = parse_task_note("Bitte prüfen (Dokument-ID: 99) bis Freitag")
+    assert note.doc_id == "99"
+    assert note.status is None
+    assert note.extra == ("Bitte prüfen (Dokument-ID: 99) bis Freitag",)
+
+
+def test_legacy_note_is_upgraded_on_render():
+    legacy = "Status: Unbearbeitet\n\n\nDokument-ID: 7\n\n"
+    rendered = parse_task_note(legacy).render()
+    assert rendered == "Status: Unbearbeitet\nDokument-ID: 7\nNotizformat: 1"
+    assert parse_task_note(rendered).render() == rendered
+
+
+@pytest.mark.parametrize("notes", [None, "", "nur Text", "Dokument-ID: abc"])
+def test_notes_without_doc_id(notes):
+    assert get_doc_id_from_notes(notes) is None
+
+
+def test_status_update_keeps_own_text_and_is_idempotent():
+    once = build_status_note(VERSIONED, "Erledigt", "2024-04-01")
+    twice = build_status_note(once, "Erledigt", "2024-04-01")
+    assert once == twice
+    note = parse_task_note(once)
+    assert (note.status, note.date) == ("Erledigt", "2024-04-01")
+    assert note.extra == ("Rückfrage bei Anna",)
+    assert note.doc_id == "42"
+
+
+def test_replace_returns_copy():
+    note = TaskNote(status="Unbearbeitet", doc_id=5)
+    changed = note.replace(status="Erledigt", date="2024-01-02")
+    assert note.status == "Unbearbeitet" and note.date is None
+    assert changed.status == "Erledigt" and changed.doc_id == "5"
+    assert changed.render() == "Status: Erledigt (am 2024-01-02)\nDokument-ID: 5\nNotizformat: 1"
@@ -0,0 +1,65 @@
+import pytest
+
+import paperless_task_integration
+from paperless_task_integration import TokenBucket
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(paperless_task_integration.time, "monotonic", lambda: now[0])
+    return now
+
+
+def test_starts_full_and_refills_at_rate(clock):
+    bucket = TokenBucket(rate=2, capacity=4)
+    assert bucket.available() == 4
+    for _ in range(4):
+        assert bucket.take() == 0.0
+    assert bucket.take() == pytest.approx(0.5)
+    clock[0] += 1
+    assert bucket.available() == pytest.approx(2)
+    clock[0] += 60
+    assert bucket.available() == 4
+
+
+def test_keep_leaves_reserve(clock):
+    bucket = TokenBucket(rate=1, capacity=10)
+    assert bucket.take(7, keep=2) == 0.0
+    assert bucket.take(2, keep=2) == pytest.approx(1)
+    assert bucket.available() == pytest.approx(3)
+
+
+def test_oversized_request_goes_into_debt(clock):
+    bucket = TokenBucket(rate=10, capacity=5)
+    # Ein Batch über der Kapazität wird bei vollem Bucket gewährt ...
+    assert bucket.take(20) == 0.0
+    assert bucket.available() == pytest.approx(-15)
+    # ... und die Schuld müssen die folgenden Aufrufe abwarten
+    assert bucket.take() == pytest.approx(1.6)
+    clock[0] += 1.6
+    assert bucket.take() == 0.0
+
+
+def test_set_rate_keeps_accrued_tokens(clock):
+    bucket = TokenBucket(rate=1, capacity=10)
+    bucket.take(10)
+    clock[0] += 2
+    bucket.set_rate(5)
+    assert bucket.available() == pytest.approx(2)
+    clock[0] += 1
+    assert bucket.available() == pytest.approx(7)
+
+
+def test_acquire_sleeps_until_tokens_are_available(clock, monkeypatch):
+    slept = []
+
+    def fake_sleep(seconds):
+        slept.append(seconds)
+        clock[0] += seconds
+
+    monkeypatch.setattr(paperless_task_integration.time, "sleep", fake_sleep)
+    bucket = TokenBucket(rate=4, capacity=1)
+    bucket.acquire()
+    bucket.acquire()
+    assert slept == [pytest.approx(0.25)]